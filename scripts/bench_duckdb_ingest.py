@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+DuckDB catalog ingest benchmark
+
+Compares the original DuckDB add_hash, one parameterized INSERT per file,
+against the buffered bulk ingest of database.FileHashDB on a synthetic set
+of SHA-256 digests. Each variant starts from an empty catalog, looks up
+every digest before adding it as the organizer does, and is timed until
+its rows are written.
+
+Usage: python scripts/bench_duckdb_ingest.py [--rows 1000000] [--batch-size 100] [--variant ...]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database import FileHashDB
+
+VARIANTS = ['row inserts', 'bulk ingest']
+
+
+class RowInsertDB(FileHashDB):
+    """The original DuckDB add_hash, writing each row as it is added."""
+
+    def add_hash(self, file_path, file_hash, file_size, quick_hash=None, algorithm='sha256'):
+        try:
+            self.conn.execute(
+                "INSERT INTO file_hashes (file_path, file_hash, file_size, quick_hash, algorithm) VALUES (?, ?, ?, ?, ?)",
+                [self._relative(file_path), self._digest(file_hash), file_size, quick_hash, algorithm]
+            )
+            self._index_digest(file_hash, algorithm)
+            return True
+        except Exception as e:
+            print(f"Error adding hash: {e}")
+            return False
+
+
+def synthetic_rows(count, root):
+    """Yield (path, hex digest, size) for count distinct files under root."""
+    for n in range(count):
+        digest = hashlib.sha256(n.to_bytes(8, 'little')).hexdigest()
+        yield os.path.join(root, 'Images', str(2000 + n % 25), f"IMG_{n:07d}.jpg"), digest, 100000 + n % 5000
+
+
+def run_variant(variant, args):
+    """Catalog args.rows files with one variant; returns (seconds, catalog size in bytes)."""
+    catalog = RowInsertDB if variant == 'row inserts' else FileHashDB
+    with tempfile.TemporaryDirectory() as root:
+        db = catalog(os.path.join(root, 'zensort.db'), args.batch_size, args.commit_interval_ms)
+        if not db.connect():
+            raise RuntimeError("could not open the catalog")
+        start = time.perf_counter()
+        for file_path, file_hash, file_size in synthetic_rows(args.rows, root):
+            if db.check_duplicate(file_hash) is None:
+                db.add_hash(file_path, file_hash, file_size)
+        db.flush()
+        elapsed = time.perf_counter() - start
+        if db.get_stats()['total_files'] != args.rows:
+            raise RuntimeError(f"{variant}: catalog has {db.get_stats()['total_files']} rows, expected {args.rows}")
+        db.close()
+        return elapsed, os.path.getsize(os.path.join(root, 'zensort.db'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DuckDB catalog ingest')
+    parser.add_argument('--rows', type=int, default=1000000, help='Number of files to catalog')
+    parser.add_argument('--batch-size', type=int, default=100, help='Rows written together (processing.batch_size)')
+    parser.add_argument('--commit-interval-ms', type=int, default=500, help='processing.commit_interval_ms')
+    parser.add_argument('--variant', choices=VARIANTS, action='append', help='Run only this variant (repeatable)')
+    args = parser.parse_args()
+
+    print(f"{args.rows} synthetic files, batch size {args.batch_size}")
+    print(f"{'variant':<14} {'total':>10} {'rows/s':>10} {'catalog':>10}")
+    for variant in args.variant or VARIANTS:
+        elapsed, size = run_variant(variant, args)
+        print(f"{variant:<14} {elapsed:9.1f}s {args.rows / elapsed:10.0f} {size / 1e6:8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Image export benchmark
+
+Compares the original export path (full-resolution decode, then resize)
+against create_export, which lets the JPEG decoder scale down while
+decoding, on a local corpus of large JPEGs. Each variant runs in its own
+child process, so its peak RSS is measured separately. Files are read once
+beforehand so both variants run against the same page cache state.
+
+Usage: python scripts/bench_export.py /path/to/jpegs [--max-width 3840] [--max-height 2160] [--quality 85]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+VARIANTS = ['full decode', 'draft decode']
+
+
+def legacy_export(image_path, export_path, max_width, max_height, quality):
+    """The original ImageOrganizer._create_export decode and resize."""
+    from PIL import Image
+    with Image.open(image_path) as img:
+        exif = img.info.get('exif')
+        img.load()
+        if img.width > max_width or img.height > max_height:
+            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+        if exif:
+            img.save(export_path, 'JPEG', exif=exif, quality=quality, optimize=True)
+        else:
+            img.save(export_path, 'JPEG', quality=quality, optimize=True)
+
+
+def draft_export(image_path, export_path, max_width, max_height, quality):
+    """Export through create_export, as the export phase does."""
+    from image_export import create_export
+    result = create_export({
+        'image_path': image_path,
+        'exif': None,
+        'heic': False,
+        'source': image_path,
+        'outputs': [{'id': None, 'export_path': export_path, 'max_width': max_width,
+                     'max_height': max_height, 'quality': quality}]
+    })[0]
+    if result['error']:
+        raise RuntimeError(result['error'])
+
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def collect_files(corpus):
+    """Return every JPEG under the corpus."""
+    files = []
+    for root, _, names in os.walk(corpus):
+        for name in names:
+            if name.lower().endswith(('.jpg', '.jpeg')):
+                files.append(os.path.join(root, name))
+    return sorted(files)
+
+
+def run_variant(variant, files, args):
+    """Export every file with one variant; called in a child process."""
+    export = legacy_export if variant == 'full decode' else draft_export
+    times = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n, path in enumerate(files):
+            start = time.perf_counter()
+            export(path, os.path.join(out_dir, f"{n}.jpg"), args.max_width, args.max_height, args.quality)
+            times.append(time.perf_counter() - start)
+    print(json.dumps({'times': times, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark image export decoding')
+    parser.add_argument('corpus', help='Directory of JPEG files to export')
+    parser.add_argument('--max-width', type=int, default=3840, help='Export width limit')
+    parser.add_argument('--max-height', type=int, default=2160, help='Export height limit')
+    parser.add_argument('--quality', type=int, default=85, help='Export JPEG quality')
+    parser.add_argument('--variant', choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    files = collect_files(args.corpus)
+    if args.variant:
+        run_variant(args.variant, files, args)
+        return
+    if not files:
+        print("No JPEG files found")
+        return
+    total_bytes = sum(os.path.getsize(path) for path in files)
+    print(f"Corpus: {len(files)} JPEGs, {total_bytes / 1e6:.1f} MB, "
+          f"export limit {args.max_width}x{args.max_height}")
+
+    # Warm the page cache so both variants read from the same state
+    for path in files:
+        with open(path, 'rb') as f:
+            while f.read(1024 * 1024):
+                pass
+
+    print(f"{'variant':<16} {'total':>9} {'per image':>11} {'slowest':>9} {'peak RSS':>10}")
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, args.corpus, '--variant', variant,
+             '--max-width', str(args.max_width), '--max-height', str(args.max_height),
+             '--quality', str(args.quality)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times = result['times']
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else 'n/a'
+        print(f"{variant:<16} {sum(times):8.2f}s {sum(times) / len(times) * 1000:9.1f}ms "
+              f"{max(times) * 1000:7.0f}ms {rss:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -62,6 +62,7 @@ def build_for_platform():
         "--hidden-import", "exifread", 
         "--hidden-import", "av",
         "--hidden-import", "pyacoustid",
+        "--hidden-import", "database_sqlite",
         "--collect-all", "musicbrainzngs",
         "src/main.py"
     ]
@@ -29,6 +29,7 @@ pyinstaller --onefile ^
     --hidden-import="exifread" ^
     --hidden-import="av" ^
     --hidden-import="pyacoustid" ^
+    --hidden-import="database_sqlite" ^
     --collect-all="musicbrainzngs" ^
     src/main.py
 
@@ -25,46 +25,46 @@ class AudioOrganizer:
         # Cache config values to avoid repeated dict lookups
         self.enhance_music = config.get('musicbrainz', {}).get('enabled', False)
     
-    def organize_audio(self, file_path, base_dir):
+    def organize_audio(self, file_path, base_dir, record=None):
         """Organize audio file following exact priority system."""
         # Get audio category from handler
         category = self.audio_handler.categorize_audio(file_path)
         
         # Route to appropriate directory based on category
         if category == 'call_recording':
-            return self._move_to_call_recordings(file_path, base_dir)
+            return self._move_to_call_recordings(file_path, base_dir, record)
         elif category == 'voice_message':
-            return self._move_to_voice_messages(file_path, base_dir)
+            return self._move_to_voice_messages(file_path, base_dir, record)
         elif category == 'voice_recording':
-            return self._move_to_voice_recordings(file_path, base_dir)
+            return self._move_to_voice_recordings(file_path, base_dir, record)
         elif category == 'music':
-            return self._move_to_songs(file_path, base_dir)
+            return self._move_to_songs(file_path, base_dir, record)
         else:
-            return self._move_to_other_audio(file_path, base_dir)
+            return self._move_to_other_audio(file_path, base_dir, record)
     
-    def _move_to_call_recordings(self, file_path, base_dir):
+    def _move_to_call_recordings(self, file_path, base_dir, record=None):
         """Move to Call Recordings directory."""
         dest_dir = Path(base_dir) / self.audios_dir / self.call_recordings_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         dest_path = dest_dir / Path(file_path).name
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
-    def _move_to_voice_recordings(self, file_path, base_dir):
+    def _move_to_voice_recordings(self, file_path, base_dir, record=None):
         """Move to Voice Recordings directory."""
         dest_dir = Path(base_dir) / self.audios_dir / self.voice_recordings_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         dest_path = dest_dir / Path(file_path).name
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
-    def _move_to_songs(self, file_path, base_dir):
+    def _move_to_songs(self, file_path, base_dir, record=None):
         """Move to Songs directory and enhance with MusicBrainz if enabled."""
         dest_dir = Path(base_dir) / self.audios_dir / self.songs_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         dest_path = dest_dir / Path(file_path).name
-        result = self._copy_file(file_path, dest_path)
+        result = self._copy_file(file_path, dest_path, record)
         
         # Enhance metadata if enabled and successful copy
         if result and self.enhance_music and self.music_enhancer:
@@ -72,22 +72,22 @@ class AudioOrganizer:
         
         return result
     
-    def _move_to_voice_messages(self, file_path, base_dir):
+    def _move_to_voice_messages(self, file_path, base_dir, record=None):
         """Move to Voice Messages directory."""
         dest_dir = Path(base_dir) / self.audios_dir / self.voice_messages_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         dest_path = dest_dir / Path(file_path).name
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
-    def _move_to_other_audio(self, file_path, base_dir):
+    def _move_to_other_audio(self, file_path, base_dir, record=None):
         """Move to Other audio directory."""
         dest_dir = Path(base_dir) / self.audios_dir / self.other_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         dest_path = dest_dir / Path(file_path).name
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
-    def _copy_file(self, src, dest):
+    def _copy_file(self, src, dest, record=None):
         """Copy file to destination with conflict resolution."""
-        return FileCopy.copy_with_conflict_resolution(src, dest)
\ No newline at end of file
+        return FileCopy.copy_with_conflict_resolution(src, dest, record)
\ No newline at end of file
@@ -0,0 +1,268 @@
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+try:
+    from .dedup_index import DedupIndex
+except ImportError:
+    from dedup_index import DedupIndex
+
+# Catalog file kept in the destination root
+CATALOG_NAME = 'zensort.db'
+
+# Backends selectable with catalog.backend; SQLite only needs the standard library
+BACKENDS = ('sqlite', 'duckdb')
+DEFAULT_BACKEND = 'sqlite'
+
+
+class CatalogBackend(ABC):
+    """Interface every catalog backend implements.
+
+    A backend is constructed with the catalog path and the write batching
+    and duplicate index settings, then opened with connect(). A backend
+    missing any abstract method cannot be instantiated. Digests are passed
+    in and out as hex strings and destination paths absolute; how they are
+    stored is up to the backend. Query methods print their errors and
+    return an empty or conservative result instead of raising.
+    """
+
+    # Value of catalog.backend selecting this backend
+    name = None
+    SCHEMA_VERSION = 2
+    # Path columns besides file_hashes.file_path stored relative to the destination root
+    RELATIVE_PATH_COLUMNS = (
+        ('pending_hashes', 'file_path'),
+        ('export_jobs', 'source_path'),
+        ('export_jobs', 'image_path'),
+        ('export_jobs', 'export_path'),
+        ('export_index', 'export_path'),
+        ('export_index', 'image_path'),
+    )
+
+    def __init__(self, db_path, batch_size=100, commit_interval_ms=500, dedup_index='set'):
+        self.db_path = Path(db_path)
+        self.conn = None
+        self.batch_size = max(1, int(batch_size or 1))
+        self.commit_interval = commit_interval_ms / 1000
+        # In-memory digest index answering most duplicate checks; see DedupIndex
+        self.dedup_mode = dedup_index
+        self.dedup_index = None
+        self.root = str(self.db_path.parent)
+        # Called with the number of rows converted so far while a v1 catalog is migrated
+        self.migration_progress = None
+
+    # Connection and maintenance
+
+    @abstractmethod
+    def connect(self):
+        """Open the catalog, creating or migrating its tables; returns False on failure."""
+
+    @abstractmethod
+    def migrate(self):
+        """Convert a v1 hash catalog to the current schema; returns the number of rows converted."""
+
+    @abstractmethod
+    def compact(self):
+        """Reclaim the space left by deleted rows."""
+
+    @abstractmethod
+    def flush(self):
+        """Make buffered writes durable."""
+
+    @abstractmethod
+    def close(self):
+        """Flush and close the catalog."""
+
+    @abstractmethod
+    def get_stats(self):
+        """Return {'total_files': number of cataloged digests}."""
+
+    # Hash catalog
+
+    @abstractmethod
+    def add_hash(self, file_path, file_hash, file_size, quick_hash=None, algorithm='sha256'):
+        """Catalog an organized file's digest."""
+
+    @abstractmethod
+    def check_duplicate(self, file_hash, algorithm='sha256'):
+        """Return the path of the cataloged file with this digest, or None."""
+
+    @abstractmethod
+    def has_size(self, file_size):
+        """Check whether any cataloged or pending file has this exact size."""
+
+    @abstractmethod
+    def has_quick_hash(self, quick_hash):
+        """Check whether any cataloged or pending file has this sampled fingerprint."""
+
+    @abstractmethod
+    def get_missing_quick_hashes(self, file_size, prefix):
+        """Return paths of this size whose fingerprint is missing or was sampled differently."""
+
+    @abstractmethod
+    def set_quick_hash(self, file_path, quick_hash):
+        """Store the sampled fingerprint of a cataloged or pending file."""
+
+    @abstractmethod
+    def get_stale_hashes(self, algorithm, file_size=None, quick_hash=None):
+        """Return [(file_path, file_size)] whose digest was made with another algorithm."""
+
+    @abstractmethod
+    def update_hash(self, file_path, file_hash, algorithm):
+        """Replace a cataloged file's digest."""
+
+    @abstractmethod
+    def remove_hash(self, file_path):
+        """Forget a cataloged file."""
+
+    @abstractmethod
+    def get_file_hash(self, file_path):
+        """Return (file_hash, algorithm) of a cataloged file, or None."""
+
+    # Files whose hash is deferred
+
+    @abstractmethod
+    def add_pending(self, file_path, file_size, quick_hash=None):
+        """Catalog an organized file whose hash will be computed later."""
+
+    @abstractmethod
+    def get_pending(self, file_size=None, quick_hash=None):
+        """Return [(file_path, file_size, quick_hash)] still waiting for a hash."""
+
+    @abstractmethod
+    def resolve_pending(self, file_path, file_hash, algorithm='sha256'):
+        """Move a pending file into the hash catalog."""
+
+    @abstractmethod
+    def discard_pending(self, file_path):
+        """Forget a pending file."""
+
+    # Scan index and source hash cache
+
+    @abstractmethod
+    def load_scan_dirs(self):
+        """Return {dir_path: mtime_ns} recorded by the last completed scan."""
+
+    @abstractmethod
+    def save_scan_dirs(self, dir_mtimes):
+        """Store directory mtimes observed by a completed scan."""
+
+    @abstractmethod
+    def is_file_unchanged(self, file_path, file_size, mtime_ns, inode):
+        """Check whether a source file was already handled with identical stat."""
+
+    @abstractmethod
+    def add_scan_file(self, file_path, file_size, mtime_ns, inode):
+        """Record a handled source file in the scan index."""
+
+    @abstractmethod
+    def get_cached_hash(self, dev, inode, file_size, mtime_ns, algorithm='sha256'):
+        """Return the cached hash for an unchanged file identity, or None."""
+
+    @abstractmethod
+    def cache_hash(self, dev, inode, file_size, mtime_ns, file_hash, algorithm='sha256'):
+        """Store a source file's hash."""
+
+    # Export queue and export index
+
+    @abstractmethod
+    def add_export_jobs(self, jobs):
+        """Queue image export jobs for the export phase."""
+
+    @abstractmethod
+    def get_export_jobs(self, after_id=0, limit=100):
+        """Return up to limit queued export jobs with an id above after_id, oldest first."""
+
+    @abstractmethod
+    def count_export_jobs(self):
+        """Return the number of queued export jobs."""
+
+    @abstractmethod
+    def remove_export_job(self, job_id):
+        """Remove a finished export job from the queue."""
+
+    @abstractmethod
+    def get_indexed_export(self, source_hash, algorithm, max_width, max_height, quality, export_format):
+        """Return the path of an export made from this content with these settings, or None."""
+
+    @abstractmethod
+    def add_indexed_export(self, source_hash, algorithm, max_width, max_height, quality, export_format,
+                           export_path, image_path, profile='export'):
+        """Record a created export."""
+
+    @abstractmethod
+    def remove_indexed_export(self, export_path):
+        """Forget an export."""
+
+    @abstractmethod
+    def get_stale_exports(self, profile, max_width, max_height, quality, export_format):
+        """Return [(image_path, export_path)] of a profile's exports made with other settings."""
+
+    # Helpers shared by the backends
+
+    def _digest(self, file_hash):
+        """Stored form of a hex digest."""
+        return bytes.fromhex(file_hash)
+
+    def _relative(self, file_path):
+        """Stored form of a destination path: relative to the destination root when inside it."""
+        file_path = str(file_path)
+        prefix = self.root + os.sep
+        if file_path.startswith(prefix):
+            return file_path[len(prefix):]
+        return file_path
+
+    def _absolute(self, file_path):
+        """Absolute form of a stored destination path."""
+        return os.path.join(self.root, file_path)
+
+    def _load_dedup_index(self):
+        """Load every cataloged digest into the in-memory duplicate index."""
+        count = self.conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+        self.dedup_index = DedupIndex(self.dedup_mode, count)
+        self.dedup_index.load(self.conn.execute("SELECT file_hash, algorithm FROM file_hashes"))
+
+    def _index_digest(self, file_hash, algorithm):
+        """Add a newly cataloged digest to the duplicate index."""
+        if self.dedup_index is not None:
+            self.dedup_index.add(file_hash, algorithm)
+
+
+def detect_backend(db_path):
+    """Return 'sqlite' or 'duckdb' from a catalog file's header, or None."""
+    with open(db_path, 'rb') as f:
+        header = f.read(16)
+    if header.startswith(b'SQLite format 3\x00'):
+        return 'sqlite'
+    if header[8:12] == b'DUCK':
+        return 'duckdb'
+    return None
+
+
+def catalog_class(backend):
+    """Return the FileHashDB class of a backend; DuckDB needs the duckdb package."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown catalog backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if backend == 'duckdb':
+        try:
+            from .database import FileHashDB
+        except ImportError:
+            from database import FileHashDB
+    else:
+        try:
+            from .database_sqlite import FileHashDB
+        except ImportError:
+            from database_sqlite import FileHashDB
+    return FileHashDB
+
+
+def catalog_backend(db_path, configured=DEFAULT_BACKEND):
+    """Return the backend to open a catalog with.
+
+    An existing catalog can only be read by the backend that created it,
+    so its file header wins over the configured backend.
+    """
+    if os.path.isfile(db_path) and os.path.getsize(db_path) > 0:
+        existing = detect_backend(db_path)
+        if existing:
+            return existing
+    return configured
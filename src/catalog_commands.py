@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+try:
+    from .catalog import BACKENDS, CATALOG_NAME, catalog_class, detect_backend
+except ImportError:
+    from catalog import BACKENDS, CATALOG_NAME, catalog_class, detect_backend
+
+
+def migrate_db(argv):
+    """zensort migrate-db: convert a catalog to the current schema in place."""
+    parser = argparse.ArgumentParser(
+        prog='zensort migrate-db',
+        description='Convert a ZenSort catalog (SQLite or DuckDB) to the current schema'
+    )
+    parser.add_argument('catalog',
+                        help=f'Catalog file, or the destination directory holding {CATALOG_NAME}')
+    args = parser.parse_args(argv)
+    
+    db_path = Path(args.catalog)
+    if db_path.is_dir():
+        db_path = db_path / CATALOG_NAME
+    if not db_path.is_file():
+        print(f"Error: Catalog '{db_path}' does not exist")
+        return 1
+    backend = detect_backend(db_path)
+    if backend is None:
+        print(f"Error: '{db_path}' is not a SQLite or DuckDB catalog")
+        return 1
+    try:
+        FileHashDB = catalog_class(backend)
+    except ImportError as e:
+        print(f"Error: {backend} catalogs need the {backend} package: {e}")
+        return 1
+    
+    size_before = os.path.getsize(db_path)
+    converted = []
+    
+    def progress(rows):
+        converted.append(rows)
+        print(f"\rConverted {rows} catalog entries", end='', flush=True)
+    
+    # The catalog's directory is the destination root its paths are made relative to
+    database = FileHashDB(db_path, dedup_index='off')
+    database.migration_progress = progress
+    print(f"Migrating {backend} catalog {db_path}...")
+    if not database.connect():
+        return 1
+    try:
+        if not converted:
+            print(f"Catalog is already at schema v{database.SCHEMA_VERSION}")
+            return 0
+        print()
+        database.compact()
+    finally:
+        database.close()
+    
+    size_after = os.path.getsize(db_path)
+    print(f"Catalog migrated to schema v{database.SCHEMA_VERSION}: "
+          f"{size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB")
+    return 0
+
+
+def synthetic_file(n, root):
+    """Return (path, hex digest, size) of the nth synthetic file."""
+    digest = hashlib.sha256(n.to_bytes(8, 'little')).hexdigest()
+    return os.path.join(root, 'Images', str(2000 + n % 25), f"IMG_{n:08d}.jpg"), digest, 100000 + n % 5000
+
+
+def run_catalog_workloads(backend, root, args):
+    """Run the insert, lookup and mixed workloads on a fresh catalog.
+    
+    Returns ({workload: ops/s}, catalog size in bytes after closing).
+    """
+    FileHashDB = catalog_class(backend)
+    db_path = os.path.join(root, CATALOG_NAME)
+    database = FileHashDB(db_path, args.batch_size, args.commit_interval_ms, args.dedup_index)
+    if not database.connect():
+        raise RuntimeError(f"could not open a {backend} catalog in {root}")
+    rows = args.rows
+    rates = {}
+    try:
+        # insert: catalog files 0 .. rows-1
+        start = time.perf_counter()
+        for n in range(rows):
+            database.add_hash(*synthetic_file(n, root))
+        database.flush()
+        rates['insert'] = rows / (time.perf_counter() - start)
+        
+        # lookup: duplicate checks, every other one for a cataloged digest
+        start = time.perf_counter()
+        for n in range(rows):
+            database.check_duplicate(synthetic_file(n // 2 if n % 2 else rows + n, root)[1])
+        rates['lookup'] = rows / (time.perf_counter() - start)
+        
+        # mixed: the organizer's check-then-add, every fourth file a duplicate
+        start = time.perf_counter()
+        for n in range(rows):
+            file_path, file_hash, file_size = synthetic_file(n if n % 4 == 0 else 2 * rows + n, root)
+            if database.check_duplicate(file_hash) is None:
+                database.add_hash(file_path, file_hash, file_size)
+        database.flush()
+        rates['mixed'] = rows / (time.perf_counter() - start)
+        
+        expected = rows + rows - (rows + 3) // 4
+        cataloged = database.get_stats()['total_files']
+        if cataloged != expected:
+            raise RuntimeError(f"{backend} catalog has {cataloged} rows, expected {expected}")
+    finally:
+        database.close()
+    # Include a write-ahead log the backend left next to the catalog
+    size = sum(os.path.getsize(path) for path in (db_path, db_path + '-wal', db_path + '.wal')
+               if os.path.exists(path))
+    return rates, size
+
+
+def bench_catalog(argv):
+    """zensort bench-catalog: compare the catalog backends on identical synthetic workloads."""
+    parser = argparse.ArgumentParser(
+        prog='zensort bench-catalog',
+        description='Run identical insert, lookup and mixed workloads against each catalog backend '
+                    'on a synthetic digest set and report ops/s and catalog size'
+    )
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='Files per workload (default: 100000)')
+    parser.add_argument('--backend', choices=BACKENDS, action='append',
+                        help='Backend to benchmark, repeatable (default: every installed backend)')
+    parser.add_argument('--dir',
+                        help='Directory to create the catalogs in, e.g. on the destination drive '
+                             '(default: a temporary directory)')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='processing.batch_size (default: 100)')
+    parser.add_argument('--commit-interval-ms', type=int, default=500,
+                        help='processing.commit_interval_ms (default: 500)')
+    parser.add_argument('--dedup-index', choices=('set', 'bloom', 'off'), default='set',
+                        help='processing.dedup_index (default: set)')
+    args = parser.parse_args(argv)
+    if args.rows < 1:
+        parser.error("--rows must be at least 1")
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+    
+    print(f"{args.rows} files per workload, batch size {args.batch_size}, dedup index {args.dedup_index}")
+    print(f"{'backend':<8} {'insert/s':>10} {'lookup/s':>10} {'mixed/s':>10} {'catalog':>10}")
+    status = 0
+    for backend in args.backend or BACKENDS:
+        try:
+            catalog_class(backend)
+        except ImportError as e:
+            print(f"{backend:<8} skipped: {e}")
+            if args.backend:
+                status = 1
+            continue
+        try:
+            with tempfile.TemporaryDirectory(dir=args.dir) as root:
+                rates, size = run_catalog_workloads(backend, root, args)
+        except Exception as e:
+            print(f"{backend:<8} failed: {e}")
+            status = 1
+            continue
+        print(f"{backend:<8} {rates['insert']:10.0f} {rates['lookup']:10.0f} {rates['mixed']:10.0f} "
+              f"{size / 1e6:8.1f}MB")
+        sys.stdout.flush()
+    return status
@@ -3,8 +3,16 @@ import sys
 from pathlib import Path
 try:
     from .files_organizer import FilesOrganizer
+    from .catalog_commands import migrate_db, bench_catalog
 except ImportError:
     from files_organizer import FilesOrganizer
+    from catalog_commands import migrate_db, bench_catalog
+
+# Subcommands, given as the first argument instead of a source directory
+COMMANDS = {
+    'migrate-db': migrate_db,
+    'bench-catalog': bench_catalog,
+}
 
 
 def progress_callback(current, total, stats):
@@ -17,9 +25,15 @@ def progress_callback(current, total, stats):
 
 def main():
     """Main CLI entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+    
     parser = argparse.ArgumentParser(
         description='ZenSort - Organize your files automatically',
-        formatter_class=argparse.RawDescriptionHelpFormatter
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='Commands:\n'
+               '  migrate-db CATALOG    Convert a catalog to the current schema\n'
+               '  bench-catalog         Compare the catalog backends on synthetic workloads'
     )
     
     parser.add_argument('source', 
@@ -75,6 +89,7 @@ def main():
         print(f"Skipped: {stats['skipped']}")
         print(f"Duplicates: {stats['duplicates']}")
         print(f"Errors: {stats['errors']}")
+        print(f"Exports: {stats['exports']} ({stats['export_errors']} failed)")
         
         sys.exit(0 if success else 1)
         
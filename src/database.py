@@ -1,11 +1,43 @@
+import os
+import json
+import time
 import duckdb
-from pathlib import Path
+try:
+    from .catalog import CatalogBackend
+    from .dedup_index import MODES as DEDUP_MODES
+except ImportError:
+    from catalog import CatalogBackend
+    from dedup_index import MODES as DEDUP_MODES
 
 
-class FileHashDB:
-    def __init__(self, db_path):
-        self.db_path = Path(db_path)
-        self.conn = None
+class FileHashDB(CatalogBackend):
+    """DuckDB catalog with buffered bulk ingest.
+    
+    A columnar engine pays a full statement and index update for every
+    single-row INSERT, so cataloged hashes and scan index entries are
+    buffered in memory and written in one bulk INSERT per table once
+    batch_size rows are buffered or the oldest has waited
+    commit_interval_ms. Duplicate, size and fingerprint checks consult the
+    buffer as well, other reads of those tables flush it first; flush()
+    writes it early, e.g. on pause or stop, and close() writes what is left.
+    A crash loses at most the rows buffered since the last flush.
+    
+    Digests are passed in and out as hex strings and stored as raw bytes;
+    destination paths are passed in and out absolute and stored relative
+    to the destination root, the directory holding the catalog.
+    """
+    
+    name = 'duckdb'
+    
+    def __init__(self, db_path, batch_size=100, commit_interval_ms=500, dedup_index='set'):
+        super().__init__(db_path, batch_size, commit_interval_ms, dedup_index)
+        # Rows waiting for the next bulk write: {(digest bytes, algorithm): (path, size, quick hash)}
+        # and {source path: (size, mtime_ns, inode)}
+        self.buffered_hashes = {}
+        self.buffered_scans = {}
+        self.buffered_sizes = set()
+        self.buffered_quick_hashes = set()
+        self._first_buffered = None
         
     def connect(self):
         """Connect to DuckDB database."""
@@ -13,6 +45,8 @@ class FileHashDB:
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
             self.conn = duckdb.connect(str(self.db_path))
             self._create_tables()
+            if self.dedup_mode in DEDUP_MODES:
+                self._load_dedup_index()
             return True
         except Exception as e:
             print(f"Database connection error: {e}")
@@ -21,52 +55,678 @@ class FileHashDB:
     def _create_tables(self):
         """Create file hash table with indexes for performance."""
         self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS file_hashes (
-                id INTEGER PRIMARY KEY,
-                file_path VARCHAR,
+            CREATE TABLE IF NOT EXISTS catalog_info (
+                key VARCHAR PRIMARY KEY,
+                value VARCHAR NOT NULL
+            )
+        """)
+        
+        # v1 catalogs have an id key, hex digests and absolute paths
+        legacy = 'id' in self._columns('file_hashes')
+        if legacy:
+            # Columns added to v1 catalogs over time, read by the migration
+            self._add_column('file_hashes', 'quick_hash', 'VARCHAR')
+            self._add_column('file_hashes', 'algorithm', "VARCHAR DEFAULT 'sha256'")
+        else:
+            self._create_file_hashes()
+        
+        # Organized files whose hash is deferred because no other file had their size
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_hashes (
+                file_path VARCHAR PRIMARY KEY,
+                file_size BIGINT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pending_size ON pending_hashes(file_size)")
+        
+        # Sampled fingerprint for tiered duplicate checks
+        self._add_column('pending_hashes', 'quick_hash', 'VARCHAR')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pending_quick ON pending_hashes(quick_hash)")
+        
+        # Scan index for incremental rescans
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_dirs (
+                dir_path VARCHAR PRIMARY KEY,
+                mtime_ns BIGINT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_files (
+                file_path VARCHAR PRIMARY KEY,
+                file_size BIGINT NOT NULL,
+                mtime_ns BIGINT NOT NULL,
+                inode BIGINT NOT NULL
+            )
+        """)
+        
+        # Source hash cache keyed by file identity
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS hash_cache (
+                dev BIGINT NOT NULL,
+                inode BIGINT NOT NULL,
+                file_size BIGINT NOT NULL,
+                mtime_ns BIGINT NOT NULL,
                 file_hash VARCHAR NOT NULL,
-                file_size BIGINT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                PRIMARY KEY (dev, inode)
             )
         """)
         
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_hash ON file_hashes(file_hash)")
+        # Digests of different algorithms are never compared; rows from before this column are SHA-256
+        self._add_column('hash_cache', 'algorithm', "VARCHAR DEFAULT 'sha256'")
+        
+        # Image exports queued by the copy phase, drained by the export phase
+        self.conn.execute("CREATE SEQUENCE IF NOT EXISTS export_job_ids")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS export_jobs (
+                id BIGINT PRIMARY KEY DEFAULT nextval('export_job_ids'),
+                source_path VARCHAR NOT NULL,
+                image_path VARCHAR NOT NULL,
+                export_path VARCHAR NOT NULL,
+                exif BLOB,
+                max_width INTEGER NOT NULL,
+                max_height INTEGER NOT NULL,
+                quality INTEGER NOT NULL,
+                heic BOOLEAN NOT NULL
+            )
+        """)
+        
+        # Created exports keyed by source content and export settings
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS export_index (
+                source_hash VARCHAR NOT NULL,
+                algorithm VARCHAR NOT NULL,
+                max_width INTEGER NOT NULL,
+                max_height INTEGER NOT NULL,
+                quality INTEGER NOT NULL,
+                export_format VARCHAR NOT NULL,
+                export_path VARCHAR NOT NULL,
+                image_path VARCHAR NOT NULL,
+                PRIMARY KEY (source_hash, algorithm, max_width, max_height, quality, export_format)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_export_path ON export_index(export_path)")
+        
+        # Export profile of each job and export; earlier ones belong to the single default export
+        self._add_column('export_jobs', 'profile', "VARCHAR DEFAULT 'export'")
+        self._add_column('export_index', 'profile', "VARCHAR DEFAULT 'export'")
+        
+        if legacy:
+            self.migrate()
+        else:
+            self.conn.execute("INSERT OR IGNORE INTO catalog_info (key, value) VALUES ('schema_version', ?)",
+                              [str(self.SCHEMA_VERSION)])
+    
+    def _create_file_hashes(self):
+        """Create the v2 hash catalog: one row per digest, keyed by the raw digest bytes."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                file_hash BLOB NOT NULL,
+                algorithm VARCHAR NOT NULL DEFAULT 'sha256',
+                file_path VARCHAR NOT NULL,
+                file_size BIGINT,
+                quick_hash VARCHAR,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (file_hash, algorithm)
+            )
+        """)
         self.conn.execute("CREATE INDEX IF NOT EXISTS idx_path ON file_hashes(file_path)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_size ON file_hashes(file_size)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_quick ON file_hashes(quick_hash)")
     
-    def add_hash(self, file_path, file_hash, file_size):
-        """Add file hash to database."""
+    def migrate(self):
+        """Convert a v1 hash catalog to the v2 schema in place.
+        
+        A single INSERT ... SELECT streams the rows into a new table inside
+        DuckDB, with digests converted to bytes and paths made relative to
+        the destination root; rows repeating an already cataloged digest are
+        dropped. Pending and export paths are made relative in place.
+        Returns the number of rows converted.
+        """
+        prefix = self.root + os.sep
+        # One transaction, so an interrupted migration leaves the v1 catalog as it was
+        self.conn.execute("BEGIN TRANSACTION")
         try:
+            # Indexes depend on the table and their names are reused by v2
+            for index in ('idx_hash', 'idx_path', 'idx_size', 'idx_quick', 'idx_algorithm'):
+                self.conn.execute(f"DROP INDEX IF EXISTS {index}")
+            self.conn.execute("ALTER TABLE file_hashes RENAME TO file_hashes_v1")
+            self._create_file_hashes()
+            converted = self.conn.execute("SELECT COUNT(*) FROM file_hashes_v1").fetchone()[0]
             self.conn.execute(
-                "INSERT INTO file_hashes (file_path, file_hash, file_size) VALUES (?, ?, ?)",
-                [str(file_path), file_hash, file_size]
+                "INSERT OR IGNORE INTO file_hashes (file_hash, algorithm, file_path, file_size, quick_hash, created_at) "
+                "SELECT unhex(file_hash), coalesce(algorithm, 'sha256'), "
+                "CASE WHEN starts_with(file_path, ?) THEN substr(file_path, ?) ELSE coalesce(file_path, '') END, "
+                "file_size, quick_hash, created_at FROM file_hashes_v1",
+                [prefix, len(prefix) + 1]
             )
+            # Pending, export queue and export index paths are relative too
+            for table, column in self.RELATIVE_PATH_COLUMNS:
+                self.conn.execute(
+                    f"UPDATE {table} SET {column} = substr({column}, ?) WHERE starts_with({column}, ?)",
+                    [len(prefix) + 1, prefix]
+                )
+            self.conn.execute("DROP TABLE file_hashes_v1")
+            self.conn.execute("INSERT OR REPLACE INTO catalog_info (key, value) VALUES ('schema_version', ?)",
+                              [str(self.SCHEMA_VERSION)])
+            self.conn.execute("COMMIT")
+        except Exception:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            raise
+        if self.migration_progress:
+            self.migration_progress(converted)
+        return converted
+    
+    def compact(self):
+        """Rewrite the catalog into a fresh file; DuckDB never shrinks a file in place."""
+        self.flush()
+        compacted = self.db_path.with_name(self.db_path.name + '.compact')
+        if compacted.exists():
+            compacted.unlink()
+        current = self.conn.execute("SELECT current_database()").fetchone()[0]
+        quoted = str(compacted).replace("'", "''")
+        self.conn.execute(f"ATTACH '{quoted}' AS compacted")
+        self.conn.execute(f'COPY FROM DATABASE "{current}" TO compacted')
+        self.conn.execute("DETACH compacted")
+        self.conn.close()
+        os.replace(compacted, self.db_path)
+        self.conn = duckdb.connect(str(self.db_path))
+    
+    def _add_column(self, table, column, column_type):
+        """Add a column to an existing table if it is missing."""
+        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {column_type}")
+    
+    def _columns(self, table):
+        """Return the column names of a table, empty if it doesn't exist."""
+        return [row[0] for row in self.conn.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = ?", [table]
+        ).fetchall()]
+    
+    def add_hash(self, file_path, file_hash, file_size, quick_hash=None, algorithm='sha256'):
+        """Add file hash to database; the row is written with the next bulk flush."""
+        try:
+            key = (self._digest(file_hash), algorithm)
+            if key in self.buffered_hashes:
+                raise ValueError(f"digest {file_hash} is already cataloged")
+            self.buffered_hashes[key] = (self._relative(file_path), file_size, quick_hash)
+            self.buffered_sizes.add(file_size)
+            if quick_hash is not None:
+                self.buffered_quick_hashes.add(quick_hash)
+            self._index_digest(file_hash, algorithm)
+            self._buffered()
             return True
         except Exception as e:
             print(f"Error adding hash: {e}")
             return False
     
-    def check_duplicate(self, file_hash):
+    def check_duplicate(self, file_hash, algorithm='sha256'):
         """Check if hash exists and return matching file path."""
+        # Digests the index has never seen need no query
+        if self.dedup_index is not None and not self.dedup_index.might_contain(file_hash, algorithm):
+            return None
         try:
+            buffered = self.buffered_hashes.get((self._digest(file_hash), algorithm))
+            if buffered:
+                return self._absolute(buffered[0])
             result = self.conn.execute(
-                "SELECT file_path FROM file_hashes WHERE file_hash = ? LIMIT 1",
-                [file_hash]
+                "SELECT file_path FROM file_hashes WHERE file_hash = ? AND algorithm = ?",
+                [self._digest(file_hash), algorithm]
             ).fetchone()
-            return result[0] if result else None
+            return self._absolute(result[0]) if result else None
         except Exception as e:
             print(f"Error checking duplicate: {e}")
             return None
     
+    def has_size(self, file_size):
+        """Check whether any cataloged or pending file has this exact size."""
+        if file_size in self.buffered_sizes:
+            return True
+        try:
+            result = self.conn.execute(
+                "SELECT 1 FROM file_hashes WHERE file_size = ? "
+                "UNION ALL SELECT 1 FROM pending_hashes WHERE file_size = ? LIMIT 1",
+                [file_size, file_size]
+            ).fetchone()
+            return result is not None
+        except Exception as e:
+            print(f"Error checking size index: {e}")
+            # Unknown means the caller must fall back to a full duplicate check
+            return True
+    
+    def add_pending(self, file_path, file_size, quick_hash=None):
+        """Catalog an organized file whose hash will be computed later."""
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pending_hashes (file_path, file_size, quick_hash) VALUES (?, ?, ?)",
+                [self._relative(file_path), file_size, quick_hash]
+            )
+            return True
+        except Exception as e:
+            print(f"Error adding pending hash: {e}")
+            return False
+    
+    def get_pending(self, file_size=None, quick_hash=None):
+        """Return [(file_path, file_size, quick_hash)] still waiting for a hash.
+        
+        Optionally restricted to one size, and within it to one fingerprint.
+        """
+        try:
+            query = "SELECT file_path, file_size, quick_hash FROM pending_hashes"
+            params = []
+            if file_size is not None:
+                query += " WHERE file_size = ?"
+                params = [file_size]
+                if quick_hash is not None:
+                    query += " AND quick_hash = ?"
+                    params = [file_size, quick_hash]
+            return [(self._absolute(row[0]), row[1], row[2]) for row in self.conn.execute(query, params).fetchall()]
+        except Exception as e:
+            print(f"Error reading pending hashes: {e}")
+            return []
+    
+    def resolve_pending(self, file_path, file_hash, algorithm='sha256'):
+        """Move a pending file into the hash catalog."""
+        self.flush()
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            self.conn.execute(
+                "INSERT INTO file_hashes (file_path, file_hash, file_size, quick_hash, algorithm) "
+                "SELECT file_path, ?, file_size, quick_hash, ? FROM pending_hashes WHERE file_path = ?",
+                [self._digest(file_hash), algorithm, self._relative(file_path)]
+            )
+            self.conn.execute("DELETE FROM pending_hashes WHERE file_path = ?", [self._relative(file_path)])
+            self.conn.execute("COMMIT")
+            self._index_digest(file_hash, algorithm)
+            return True
+        except Exception as e:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            print(f"Error resolving pending hash: {e}")
+            return False
+    
+    def has_quick_hash(self, quick_hash):
+        """Check whether any cataloged or pending file has this sampled fingerprint."""
+        if quick_hash in self.buffered_quick_hashes:
+            return True
+        try:
+            result = self.conn.execute(
+                "SELECT 1 FROM file_hashes WHERE quick_hash = ? "
+                "UNION ALL SELECT 1 FROM pending_hashes WHERE quick_hash = ? LIMIT 1",
+                [quick_hash, quick_hash]
+            ).fetchone()
+            return result is not None
+        except Exception as e:
+            print(f"Error checking fingerprint index: {e}")
+            # Unknown means the caller must fall back to a full duplicate check
+            return True
+    
+    def get_missing_quick_hashes(self, file_size, prefix):
+        """Return paths of this size whose fingerprint is missing or was sampled differently."""
+        self.flush()
+        try:
+            rows = self.conn.execute(
+                "SELECT file_path FROM file_hashes WHERE file_size = ? "
+                "AND (quick_hash IS NULL OR NOT starts_with(quick_hash, ?)) "
+                "UNION ALL SELECT file_path FROM pending_hashes WHERE file_size = ? "
+                "AND (quick_hash IS NULL OR NOT starts_with(quick_hash, ?))",
+                [file_size, prefix, file_size, prefix]
+            ).fetchall()
+            return [self._absolute(row[0]) for row in rows]
+        except Exception as e:
+            print(f"Error reading fingerprint index: {e}")
+            return []
+    
+    def set_quick_hash(self, file_path, quick_hash):
+        """Store the sampled fingerprint of a cataloged or pending file."""
+        self.flush()
+        try:
+            self.conn.execute("UPDATE file_hashes SET quick_hash = ? WHERE file_path = ?",
+                              [quick_hash, self._relative(file_path)])
+            self.conn.execute("UPDATE pending_hashes SET quick_hash = ? WHERE file_path = ?",
+                              [quick_hash, self._relative(file_path)])
+            return True
+        except Exception as e:
+            print(f"Error storing fingerprint: {e}")
+            return False
+    
+    def discard_pending(self, file_path):
+        """Forget a pending file, e.g. when it no longer exists."""
+        try:
+            self.conn.execute("DELETE FROM pending_hashes WHERE file_path = ?", [self._relative(file_path)])
+            return True
+        except Exception as e:
+            print(f"Error discarding pending hash: {e}")
+            return False
+    
+    def get_stale_hashes(self, algorithm, file_size=None, quick_hash=None):
+        """Return [(file_path, file_size)] whose digest was made with another algorithm.
+        
+        Optionally restricted to one size, and within it to one fingerprint.
+        """
+        self.flush()
+        try:
+            query = "SELECT file_path, file_size FROM file_hashes WHERE algorithm != ?"
+            params = [algorithm]
+            if file_size is not None:
+                query += " AND file_size = ?"
+                params = [algorithm, file_size]
+                if quick_hash is not None:
+                    query += " AND quick_hash = ?"
+                    params = [algorithm, file_size, quick_hash]
+            return [(self._absolute(row[0]), row[1]) for row in self.conn.execute(query, params).fetchall()]
+        except Exception as e:
+            print(f"Error reading stale hashes: {e}")
+            return []
+    
+    def update_hash(self, file_path, file_hash, algorithm):
+        """Replace a cataloged file's digest, e.g. after re-hashing with another algorithm."""
+        self.flush()
+        try:
+            self.conn.execute(
+                "UPDATE file_hashes SET file_hash = ?, algorithm = ? WHERE file_path = ?",
+                [self._digest(file_hash), algorithm, self._relative(file_path)]
+            )
+            self._index_digest(file_hash, algorithm)
+            return True
+        except Exception as e:
+            print(f"Error updating hash: {e}")
+            return False
+    
+    def remove_hash(self, file_path):
+        """Forget a cataloged file, e.g. when it no longer exists."""
+        self.flush()
+        try:
+            self.conn.execute("DELETE FROM file_hashes WHERE file_path = ?", [self._relative(file_path)])
+            return True
+        except Exception as e:
+            print(f"Error removing hash: {e}")
+            return False
+    
+    def load_scan_dirs(self):
+        """Return {dir_path: mtime_ns} recorded by the last completed scan."""
+        try:
+            rows = self.conn.execute("SELECT dir_path, mtime_ns FROM scan_dirs").fetchall()
+            return dict(rows)
+        except Exception as e:
+            print(f"Error loading scan index: {e}")
+            return {}
+    
+    def save_scan_dirs(self, dir_mtimes):
+        """Store directory mtimes observed by a completed scan."""
+        self.flush()
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scan_dirs (dir_path, mtime_ns) VALUES (?, ?)",
+                [list(item) for item in dir_mtimes.items()]
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving scan index: {e}")
+            return False
+    
+    def is_file_unchanged(self, file_path, file_size, mtime_ns, inode):
+        """Check whether a source file was already handled with identical stat."""
+        buffered = self.buffered_scans.get(str(file_path))
+        if buffered:
+            return buffered == (file_size, mtime_ns, inode)
+        try:
+            result = self.conn.execute(
+                "SELECT file_size, mtime_ns, inode FROM scan_files WHERE file_path = ?",
+                [str(file_path)]
+            ).fetchone()
+            return result == (file_size, mtime_ns, inode)
+        except Exception as e:
+            print(f"Error checking scan index: {e}")
+            return False
+    
+    def add_scan_file(self, file_path, file_size, mtime_ns, inode):
+        """Record a handled source file in the scan index; written with the next bulk flush."""
+        try:
+            self.buffered_scans[str(file_path)] = (file_size, mtime_ns, inode)
+            self._buffered()
+            return True
+        except Exception as e:
+            print(f"Error adding scan entry: {e}")
+            return False
+    
+    def get_cached_hash(self, dev, inode, file_size, mtime_ns, algorithm='sha256'):
+        """Return the cached hash for an unchanged file identity, or None."""
+        try:
+            result = self.conn.execute(
+                "SELECT file_hash FROM hash_cache WHERE dev = ? AND inode = ? AND file_size = ? "
+                "AND mtime_ns = ? AND algorithm = ?",
+                [dev, inode, file_size, mtime_ns, algorithm]
+            ).fetchone()
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error reading hash cache: {e}")
+            return None
+    
+    def cache_hash(self, dev, inode, file_size, mtime_ns, file_hash, algorithm='sha256'):
+        """Store a file's hash, replacing any stale entry for the same identity."""
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO hash_cache (dev, inode, file_size, mtime_ns, file_hash, algorithm) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [dev, inode, file_size, mtime_ns, file_hash, algorithm]
+            )
+            return True
+        except Exception as e:
+            print(f"Error writing hash cache: {e}")
+            return False
+    
+    def add_export_jobs(self, jobs):
+        """Queue image export jobs for the export phase; jobs of one image should be added together."""
+        try:
+            self.conn.executemany(
+                "INSERT INTO export_jobs (source_path, image_path, export_path, exif, max_width, max_height, quality, heic, "
+                "profile) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [[self._relative(job['source']), self._relative(job['image_path']), self._relative(job['export_path']),
+                  job['exif'], job['max_width'],
+                  job['max_height'], job['quality'], bool(job['heic']), job['profile']] for job in jobs]
+            )
+            return True
+        except Exception as e:
+            print(f"Error queuing exports: {e}")
+            return False
+    
+    def get_export_jobs(self, after_id=0, limit=100):
+        """Return up to limit queued export jobs with an id above after_id, oldest first."""
+        try:
+            rows = self.conn.execute(
+                "SELECT id, source_path, image_path, export_path, exif, max_width, max_height, quality, heic, profile "
+                "FROM export_jobs WHERE id > ? ORDER BY id LIMIT ?",
+                [after_id, limit]
+            ).fetchall()
+            return [{'id': row[0], 'source': self._absolute(row[1]), 'image_path': self._absolute(row[2]),
+                     'export_path': self._absolute(row[3]),
+                     'exif': row[4], 'max_width': row[5], 'max_height': row[6], 'quality': row[7],
+                     'heic': bool(row[8]), 'profile': row[9]} for row in rows]
+        except Exception as e:
+            print(f"Error reading export queue: {e}")
+            return []
+    
+    def count_export_jobs(self):
+        """Return the number of queued export jobs."""
+        try:
+            return self.conn.execute("SELECT COUNT(*) FROM export_jobs").fetchone()[0]
+        except Exception as e:
+            print(f"Error reading export queue: {e}")
+            return 0
+    
+    def remove_export_job(self, job_id):
+        """Remove a finished export job from the queue."""
+        try:
+            self.conn.execute("DELETE FROM export_jobs WHERE id = ?", [job_id])
+            return True
+        except Exception as e:
+            print(f"Error removing export job: {e}")
+            return False
+    
+    def get_file_hash(self, file_path):
+        """Return (file_hash, algorithm) of a cataloged file, or None."""
+        self.flush()
+        try:
+            result = self.conn.execute(
+                "SELECT file_hash, algorithm FROM file_hashes WHERE file_path = ? LIMIT 1",
+                [self._relative(file_path)]
+            ).fetchone()
+            return (result[0].hex(), result[1]) if result else None
+        except Exception as e:
+            print(f"Error reading hash: {e}")
+            return None
+    
+    def get_indexed_export(self, source_hash, algorithm, max_width, max_height, quality, export_format):
+        """Return the path of an export made from this content with these settings, or None."""
+        try:
+            result = self.conn.execute(
+                "SELECT export_path FROM export_index WHERE source_hash = ? AND algorithm = ? "
+                "AND max_width = ? AND max_height = ? AND quality = ? AND export_format = ?",
+                [source_hash, algorithm, max_width, max_height, quality, export_format]
+            ).fetchone()
+            return self._absolute(result[0]) if result else None
+        except Exception as e:
+            print(f"Error reading export index: {e}")
+            return None
+    
+    def add_indexed_export(self, source_hash, algorithm, max_width, max_height, quality, export_format,
+                           export_path, image_path, profile='export'):
+        """Record a created export, replacing any entry for the same export file."""
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            self.conn.execute("DELETE FROM export_index WHERE export_path = ?", [self._relative(export_path)])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO export_index (source_hash, algorithm, max_width, max_height, quality, "
+                "export_format, export_path, image_path, profile) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [source_hash, algorithm, max_width, max_height, quality, export_format,
+                 self._relative(export_path), self._relative(image_path), profile]
+            )
+            self.conn.execute("COMMIT")
+            return True
+        except Exception as e:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            print(f"Error updating export index: {e}")
+            return False
+    
+    def remove_indexed_export(self, export_path):
+        """Forget an export, e.g. when it could not be recreated."""
+        try:
+            self.conn.execute("DELETE FROM export_index WHERE export_path = ?", [self._relative(export_path)])
+            return True
+        except Exception as e:
+            print(f"Error updating export index: {e}")
+            return False
+    
+    def get_stale_exports(self, profile, max_width, max_height, quality, export_format):
+        """Return [(image_path, export_path)] of a profile's exports made with other settings that are not queued yet."""
+        try:
+            rows = self.conn.execute(
+                "SELECT image_path, export_path FROM export_index "
+                "WHERE profile = ? AND NOT (max_width = ? AND max_height = ? AND quality = ? AND export_format = ?) "
+                "AND export_path NOT IN (SELECT export_path FROM export_jobs)",
+                [profile, max_width, max_height, quality, export_format]
+            ).fetchall()
+            return [(self._absolute(row[0]), self._absolute(row[1])) for row in rows]
+        except Exception as e:
+            print(f"Error reading export index: {e}")
+            return []
+    
     def get_stats(self):
         """Get database statistics."""
+        self.flush()
         try:
             result = self.conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()
             return {"total_files": result[0] if result else 0}
         except Exception:
             return {"total_files": 0}
     
+    def _buffered(self):
+        """Note a buffered row and flush once the batch is full or old enough."""
+        now = time.monotonic()
+        if self._first_buffered is None:
+            self._first_buffered = now
+        if (len(self.buffered_hashes) + len(self.buffered_scans) >= self.batch_size
+                or now - self._first_buffered >= self.commit_interval):
+            self.flush()
+    
+    def flush(self):
+        """Write buffered rows in one transaction with a bulk INSERT per table.
+        
+        Each table's rows are bound as a single JSON document of columns and
+        unnested by DuckDB, since binding values one by one from Python costs
+        more than the insert itself.
+        """
+        if not self.buffered_hashes and not self.buffered_scans:
+            return True
+        hashes, scans = self.buffered_hashes, self.buffered_scans
+        self.buffered_hashes, self.buffered_scans = {}, {}
+        self.buffered_sizes, self.buffered_quick_hashes = set(), set()
+        self._first_buffered = None
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            if hashes:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO file_hashes (file_hash, algorithm, file_path, file_size, quick_hash) "
+                    "SELECT unhex(unnest(c[1]::VARCHAR[])), unnest(c[2]::VARCHAR[]), unnest(c[3]::VARCHAR[]), "
+                    "unnest(c[4]::BIGINT[]), unnest(c[5]::VARCHAR[]) FROM (SELECT json(?)::JSON[] AS c)",
+                    [self._columns_document((digest.hex(), algorithm) + row for (digest, algorithm), row in hashes.items())]
+                )
+            if scans:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO scan_files (file_path, file_size, mtime_ns, inode) "
+                    "SELECT unnest(c[1]::VARCHAR[]), unnest(c[2]::BIGINT[]), unnest(c[3]::BIGINT[]), "
+                    "unnest(c[4]::BIGINT[]) FROM (SELECT json(?)::JSON[] AS c)",
+                    [self._columns_document((path,) + row for path, row in scans.items())]
+                )
+            self.conn.execute("COMMIT")
+            return True
+        except Exception as e:
+            try:
+                self.conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            print(f"Error writing catalog batch: {e}")
+            # Keep the rows that can be written rather than losing the whole batch
+            return self._write_rows(hashes, scans)
+    
+    def _columns_document(self, rows):
+        """JSON array of the columns of rows."""
+        return json.dumps([list(column) for column in zip(*rows)])
+    
+    def _write_rows(self, hashes, scans):
+        """Write buffered rows one statement at a time, skipping any that fail."""
+        written = True
+        for (digest, algorithm), (file_path, file_size, quick_hash) in hashes.items():
+            try:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO file_hashes (file_hash, algorithm, file_path, file_size, quick_hash) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [digest, algorithm, file_path, file_size, quick_hash]
+                )
+            except Exception as e:
+                print(f"Error adding hash: {e}")
+                written = False
+        for file_path, (file_size, mtime_ns, inode) in scans.items():
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO scan_files (file_path, file_size, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+                    [file_path, file_size, mtime_ns, inode]
+                )
+            except Exception as e:
+                print(f"Error adding scan entry: {e}")
+                written = False
+        return written
+    
     def close(self):
-        """Close database connection."""
+        """Write buffered rows and close database connection."""
         if self.conn:
+            self.flush()
             self.conn.close()
             self.conn = None
\ No newline at end of file
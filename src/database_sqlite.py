@@ -1,18 +1,56 @@
+import os
 import sqlite3
-from pathlib import Path
+import time
+from contextlib import contextmanager
+try:
+    from .catalog import CatalogBackend
+    from .dedup_index import MODES as DEDUP_MODES
+except ImportError:
+    from catalog import CatalogBackend
+    from dedup_index import MODES as DEDUP_MODES
 
 
-class FileHashDB:
-    def __init__(self, db_path):
-        self.db_path = Path(db_path)
-        self.conn = None
+class FileHashDB(CatalogBackend):
+    """SQLite catalog with group commits.
+    
+    Writes are buffered in one open transaction that is committed once
+    batch_size writes are pending or the oldest has waited
+    commit_interval_ms, instead of an fsync per write. Reads go through the
+    same connection, so they see pending writes; flush() commits them early,
+    e.g. on pause or stop, and close() commits what is left. A crash loses
+    at most the writes since the last commit, never a committed one.
+    
+    With dedup_index set to 'set' or 'bloom', cataloged digests are loaded
+    into a DedupIndex on connect() and check_duplicate() only queries the
+    catalog for digests the index may contain.
+    
+    Digests are passed in and out as hex strings and stored as raw bytes;
+    destination paths are passed in and out absolute and stored relative
+    to the destination root, the directory holding the catalog.
+    """
+    
+    name = 'sqlite'
+    
+    def __init__(self, db_path, batch_size=100, commit_interval_ms=500, dedup_index='set'):
+        super().__init__(db_path, batch_size, commit_interval_ms, dedup_index)
+        self._pending_writes = 0
+        self._first_pending = None
         
     def connect(self):
         """Connect to SQLite database."""
         try:
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
-            self.conn = sqlite3.connect(str(self.db_path))
+            # Worker threads share this connection through LockedCatalog
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            # WAL appends commits instead of rewriting pages through a rollback
+            # journal, and with synchronous=NORMAL only checkpoints fsync
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA cache_size=-65536")
             self._create_tables()
+            if self.dedup_mode in DEDUP_MODES:
+                self._load_dedup_index()
             return True
         except Exception as e:
             print(f"Database connection error: {e}")
@@ -21,45 +59,609 @@ class FileHashDB:
     def _create_tables(self):
         """Create file hash table with indexes for performance."""
         self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS file_hashes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_path TEXT,
+            CREATE TABLE IF NOT EXISTS catalog_info (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        
+        # v1 catalogs have a rowid key, hex digests and absolute paths
+        legacy = 'id' in self._columns('file_hashes')
+        if legacy:
+            # Columns added to v1 catalogs over time, read by the migration
+            self._add_column('file_hashes', 'quick_hash', 'TEXT')
+            self._add_column('file_hashes', 'algorithm', "TEXT NOT NULL DEFAULT 'sha256'")
+        else:
+            self._create_file_hashes()
+        
+        # Organized files whose hash is deferred because no other file had their size
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_hashes (
+                file_path TEXT PRIMARY KEY,
+                file_size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pending_size ON pending_hashes(file_size)")
+        
+        # Sampled fingerprint for tiered duplicate checks
+        self._add_column('pending_hashes', 'quick_hash', 'TEXT')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pending_quick ON pending_hashes(quick_hash)")
+        
+        # Scan index for incremental rescans
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_dirs (
+                dir_path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_files (
+                file_path TEXT PRIMARY KEY,
+                file_size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL
+            )
+        """)
+        
+        # Source hash cache keyed by file identity
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS hash_cache (
+                dev INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                file_size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
                 file_hash TEXT NOT NULL,
-                file_size INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                PRIMARY KEY (dev, inode)
+            )
+        """)
+        
+        # Digests of different algorithms are never compared; rows from before this column are SHA-256
+        self._add_column('hash_cache', 'algorithm', "TEXT NOT NULL DEFAULT 'sha256'")
+        
+        # Image exports queued by the copy phase, drained by the export phase
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS export_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_path TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                export_path TEXT NOT NULL,
+                exif BLOB,
+                max_width INTEGER NOT NULL,
+                max_height INTEGER NOT NULL,
+                quality INTEGER NOT NULL,
+                heic INTEGER NOT NULL
             )
         """)
         
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_hash ON file_hashes(file_hash)")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_path ON file_hashes(file_path)")
+        # Created exports keyed by source content and export settings
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS export_index (
+                source_hash TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                max_width INTEGER NOT NULL,
+                max_height INTEGER NOT NULL,
+                quality INTEGER NOT NULL,
+                export_format TEXT NOT NULL,
+                export_path TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                PRIMARY KEY (source_hash, algorithm, max_width, max_height, quality, export_format)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_export_path ON export_index(export_path)")
+        
+        # Export profile of each job and export; earlier ones belong to the single default export
+        self._add_column('export_jobs', 'profile', "TEXT NOT NULL DEFAULT 'export'")
+        self._add_column('export_index', 'profile', "TEXT NOT NULL DEFAULT 'export'")
+        self.conn.commit()
+        
+        if legacy:
+            self.migrate()
+        else:
+            self.conn.execute("INSERT OR IGNORE INTO catalog_info (key, value) VALUES ('schema_version', ?)",
+                              (str(self.SCHEMA_VERSION),))
+            self.conn.commit()
+    
+    def _create_file_hashes(self, table='file_hashes'):
+        """Create the v2 hash catalog: one row per digest, keyed by the raw digest bytes."""
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                file_hash BLOB NOT NULL,
+                algorithm TEXT NOT NULL DEFAULT 'sha256',
+                file_path TEXT NOT NULL,
+                file_size INTEGER,
+                quick_hash TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (file_hash, algorithm)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_path ON {table}(file_path)")
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_size ON {table}(file_size)")
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_quick ON {table}(quick_hash)")
+    
+    def migrate(self, chunk_size=10000):
+        """Convert a v1 hash catalog to the v2 schema in place.
+        
+        Rows are streamed chunk by chunk into a new table, with digests
+        converted to bytes and paths made relative to the destination root;
+        rows repeating an already cataloged digest are dropped. Pending and
+        export paths are made relative in place. Returns the number of rows
+        converted.
+        """
+        # One transaction, so an interrupted migration leaves the v1 catalog as it was
+        self.conn.execute("BEGIN")
+        self.conn.execute("ALTER TABLE file_hashes RENAME TO file_hashes_v1")
+        # Index names are per database, so the v1 ones must go before v2 reuses them
+        for index in ('idx_hash', 'idx_path', 'idx_size', 'idx_quick', 'idx_algorithm'):
+            self.conn.execute(f"DROP INDEX IF EXISTS {index}")
+        self._create_file_hashes()
+        
+        converted = 0
+        cursor = self.conn.execute(
+            "SELECT file_hash, algorithm, file_path, file_size, quick_hash, created_at FROM file_hashes_v1"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO file_hashes (file_hash, algorithm, file_path, file_size, quick_hash, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                # v1 paths are nullable; an empty path like the DuckDB migration's, never 'None'
+                [(self._digest(row[0]), row[1], self._relative(row[2]) if row[2] is not None else '',
+                  row[3], row[4], row[5]) for row in rows]
+            )
+            converted += len(rows)
+            if self.migration_progress:
+                self.migration_progress(converted)
+        if self.migration_progress and not converted:
+            self.migration_progress(converted)
+        
+        # Pending, export queue and export index paths are relative too
+        prefix = self.root + os.sep
+        for table, column in self.RELATIVE_PATH_COLUMNS:
+            self.conn.execute(
+                f"UPDATE {table} SET {column} = substr({column}, ?) WHERE substr({column}, 1, ?) = ?",
+                (len(prefix) + 1, len(prefix), prefix)
+            )
+        self.conn.execute("DROP TABLE file_hashes_v1")
+        self.conn.execute("INSERT OR REPLACE INTO catalog_info (key, value) VALUES ('schema_version', ?)",
+                          (str(self.SCHEMA_VERSION),))
         self.conn.commit()
+        return converted
+    
+    def compact(self):
+        """Rebuild the catalog file to release the space of deleted rows."""
+        self.flush()
+        self.conn.execute("VACUUM")
+    
+    def _columns(self, table):
+        """Return the column names of a table, empty if it doesn't exist."""
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+    
+    def _written(self):
+        """Count a buffered write and commit once the batch is full or old enough."""
+        self._pending_writes += 1
+        now = time.monotonic()
+        if self._first_pending is None:
+            self._first_pending = now
+        if self._pending_writes >= self.batch_size or now - self._first_pending >= self.commit_interval:
+            self.flush()
+    
+    @contextmanager
+    def _atomic(self):
+        """Group several statements into one write that is applied or undone as a whole.
+        
+        A savepoint inside the batch transaction, so undoing it keeps the
+        other buffered writes.
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        self.conn.execute("SAVEPOINT catalog_write")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK TO catalog_write")
+            self.conn.execute("RELEASE catalog_write")
+            raise
+        self.conn.execute("RELEASE catalog_write")
+        self._written()
+    
+    def flush(self):
+        """Commit buffered writes."""
+        try:
+            self.conn.commit()
+            self._pending_writes = 0
+            self._first_pending = None
+            return True
+        except Exception as e:
+            print(f"Error committing catalog: {e}")
+            return False
     
-    def add_hash(self, file_path, file_hash, file_size):
+    def _add_column(self, table, column, column_type):
+        """Add a column to an existing table if it is missing."""
+        if column not in self._columns(table):
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    
+    def add_hash(self, file_path, file_hash, file_size, quick_hash=None, algorithm='sha256'):
         """Add file hash to database."""
         try:
             self.conn.execute(
-                "INSERT INTO file_hashes (file_path, file_hash, file_size) VALUES (?, ?, ?)",
-                (str(file_path), file_hash, file_size)
+                "INSERT INTO file_hashes (file_path, file_hash, file_size, quick_hash, algorithm) VALUES (?, ?, ?, ?, ?)",
+                (self._relative(file_path), self._digest(file_hash), file_size, quick_hash, algorithm)
             )
-            self.conn.commit()
+            self._written()
+            self._index_digest(file_hash, algorithm)
             return True
         except Exception as e:
             print(f"Error adding hash: {e}")
             return False
     
-    def check_duplicate(self, file_hash):
+    def check_duplicate(self, file_hash, algorithm='sha256'):
         """Check if hash exists and return matching file path."""
+        # Digests the index has never seen need no query
+        if self.dedup_index is not None and not self.dedup_index.might_contain(file_hash, algorithm):
+            return None
         try:
             cursor = self.conn.execute(
-                "SELECT file_path FROM file_hashes WHERE file_hash = ? LIMIT 1",
-                (file_hash,)
+                "SELECT file_path FROM file_hashes WHERE file_hash = ? AND algorithm = ?",
+                (self._digest(file_hash), algorithm)
             )
             result = cursor.fetchone()
-            return result[0] if result else None
+            return self._absolute(result[0]) if result else None
         except Exception as e:
             print(f"Error checking duplicate: {e}")
             return None
     
+    def has_size(self, file_size):
+        """Check whether any cataloged or pending file has this exact size."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT 1 FROM file_hashes WHERE file_size = ? "
+                "UNION ALL SELECT 1 FROM pending_hashes WHERE file_size = ? LIMIT 1",
+                (file_size, file_size)
+            )
+            return cursor.fetchone() is not None
+        except Exception as e:
+            print(f"Error checking size index: {e}")
+            # Unknown means the caller must fall back to a full duplicate check
+            return True
+    
+    def add_pending(self, file_path, file_size, quick_hash=None):
+        """Catalog an organized file whose hash will be computed later."""
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pending_hashes (file_path, file_size, quick_hash) VALUES (?, ?, ?)",
+                (self._relative(file_path), file_size, quick_hash)
+            )
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error adding pending hash: {e}")
+            return False
+    
+    def get_pending(self, file_size=None, quick_hash=None):
+        """Return [(file_path, file_size, quick_hash)] still waiting for a hash.
+        
+        Optionally restricted to one size, and within it to one fingerprint.
+        """
+        try:
+            query = "SELECT file_path, file_size, quick_hash FROM pending_hashes"
+            params = ()
+            if file_size is not None:
+                query += " WHERE file_size = ?"
+                params = (file_size,)
+                if quick_hash is not None:
+                    query += " AND quick_hash = ?"
+                    params = (file_size, quick_hash)
+            return [(self._absolute(row[0]), row[1], row[2]) for row in self.conn.execute(query, params)]
+        except Exception as e:
+            print(f"Error reading pending hashes: {e}")
+            return []
+    
+    def resolve_pending(self, file_path, file_hash, algorithm='sha256'):
+        """Move a pending file into the hash catalog."""
+        try:
+            with self._atomic():
+                self.conn.execute(
+                    "INSERT INTO file_hashes (file_path, file_hash, file_size, quick_hash, algorithm) "
+                    "SELECT file_path, ?, file_size, quick_hash, ? FROM pending_hashes WHERE file_path = ?",
+                    (self._digest(file_hash), algorithm, self._relative(file_path))
+                )
+                self.conn.execute("DELETE FROM pending_hashes WHERE file_path = ?", (self._relative(file_path),))
+            self._index_digest(file_hash, algorithm)
+            return True
+        except Exception as e:
+            print(f"Error resolving pending hash: {e}")
+            return False
+    
+    def has_quick_hash(self, quick_hash):
+        """Check whether any cataloged or pending file has this sampled fingerprint."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT 1 FROM file_hashes WHERE quick_hash = ? "
+                "UNION ALL SELECT 1 FROM pending_hashes WHERE quick_hash = ? LIMIT 1",
+                (quick_hash, quick_hash)
+            )
+            return cursor.fetchone() is not None
+        except Exception as e:
+            print(f"Error checking fingerprint index: {e}")
+            # Unknown means the caller must fall back to a full duplicate check
+            return True
+    
+    def get_missing_quick_hashes(self, file_size, prefix):
+        """Return paths of this size whose fingerprint is missing or was sampled differently."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT file_path FROM file_hashes WHERE file_size = ? "
+                "AND (quick_hash IS NULL OR substr(quick_hash, 1, ?) != ?) "
+                "UNION ALL SELECT file_path FROM pending_hashes WHERE file_size = ? "
+                "AND (quick_hash IS NULL OR substr(quick_hash, 1, ?) != ?)",
+                (file_size, len(prefix), prefix, file_size, len(prefix), prefix)
+            )
+            return [self._absolute(row[0]) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error reading fingerprint index: {e}")
+            return []
+    
+    def set_quick_hash(self, file_path, quick_hash):
+        """Store the sampled fingerprint of a cataloged or pending file."""
+        try:
+            with self._atomic():
+                self.conn.execute("UPDATE file_hashes SET quick_hash = ? WHERE file_path = ?",
+                                  (quick_hash, self._relative(file_path)))
+                self.conn.execute("UPDATE pending_hashes SET quick_hash = ? WHERE file_path = ?",
+                                  (quick_hash, self._relative(file_path)))
+            return True
+        except Exception as e:
+            print(f"Error storing fingerprint: {e}")
+            return False
+    
+    def discard_pending(self, file_path):
+        """Forget a pending file, e.g. when it no longer exists."""
+        try:
+            self.conn.execute("DELETE FROM pending_hashes WHERE file_path = ?", (self._relative(file_path),))
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error discarding pending hash: {e}")
+            return False
+    
+    def get_stale_hashes(self, algorithm, file_size=None, quick_hash=None):
+        """Return [(file_path, file_size)] whose digest was made with another algorithm.
+        
+        Optionally restricted to one size, and within it to one fingerprint.
+        """
+        try:
+            query = "SELECT file_path, file_size FROM file_hashes WHERE algorithm != ?"
+            params = (algorithm,)
+            if file_size is not None:
+                query += " AND file_size = ?"
+                params = (algorithm, file_size)
+                if quick_hash is not None:
+                    query += " AND quick_hash = ?"
+                    params = (algorithm, file_size, quick_hash)
+            return [(self._absolute(row[0]), row[1]) for row in self.conn.execute(query, params)]
+        except Exception as e:
+            print(f"Error reading stale hashes: {e}")
+            return []
+    
+    def update_hash(self, file_path, file_hash, algorithm):
+        """Replace a cataloged file's digest, e.g. after re-hashing with another algorithm."""
+        try:
+            self.conn.execute(
+                "UPDATE file_hashes SET file_hash = ?, algorithm = ? WHERE file_path = ?",
+                (self._digest(file_hash), algorithm, self._relative(file_path))
+            )
+            self._written()
+            self._index_digest(file_hash, algorithm)
+            return True
+        except Exception as e:
+            print(f"Error updating hash: {e}")
+            return False
+    
+    def remove_hash(self, file_path):
+        """Forget a cataloged file, e.g. when it no longer exists."""
+        try:
+            self.conn.execute("DELETE FROM file_hashes WHERE file_path = ?", (self._relative(file_path),))
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error removing hash: {e}")
+            return False
+    
+    def load_scan_dirs(self):
+        """Return {dir_path: mtime_ns} recorded by the last completed scan."""
+        try:
+            cursor = self.conn.execute("SELECT dir_path, mtime_ns FROM scan_dirs")
+            return dict(cursor.fetchall())
+        except Exception as e:
+            print(f"Error loading scan index: {e}")
+            return {}
+    
+    def save_scan_dirs(self, dir_mtimes):
+        """Store directory mtimes observed by a completed scan."""
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scan_dirs (dir_path, mtime_ns) VALUES (?, ?)",
+                dir_mtimes.items()
+            )
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error saving scan index: {e}")
+            return False
+    
+    def is_file_unchanged(self, file_path, file_size, mtime_ns, inode):
+        """Check whether a source file was already handled with identical stat."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT file_size, mtime_ns, inode FROM scan_files WHERE file_path = ?",
+                (str(file_path),)
+            )
+            return cursor.fetchone() == (file_size, mtime_ns, inode)
+        except Exception as e:
+            print(f"Error checking scan index: {e}")
+            return False
+    
+    def add_scan_file(self, file_path, file_size, mtime_ns, inode):
+        """Record a handled source file in the scan index."""
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scan_files (file_path, file_size, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+                (str(file_path), file_size, mtime_ns, inode)
+            )
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error adding scan entry: {e}")
+            return False
+    
+    def get_cached_hash(self, dev, inode, file_size, mtime_ns, algorithm='sha256'):
+        """Return the cached hash for an unchanged file identity, or None."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT file_hash FROM hash_cache WHERE dev = ? AND inode = ? AND file_size = ? "
+                "AND mtime_ns = ? AND algorithm = ?",
+                (dev, inode, file_size, mtime_ns, algorithm)
+            )
+            result = cursor.fetchone()
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error reading hash cache: {e}")
+            return None
+    
+    def cache_hash(self, dev, inode, file_size, mtime_ns, file_hash, algorithm='sha256'):
+        """Store a file's hash, replacing any stale entry for the same identity."""
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO hash_cache (dev, inode, file_size, mtime_ns, file_hash, algorithm) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (dev, inode, file_size, mtime_ns, file_hash, algorithm)
+            )
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error writing hash cache: {e}")
+            return False
+    
+    def add_export_jobs(self, jobs):
+        """Queue image export jobs for the export phase; jobs of one image should be added together."""
+        try:
+            self.conn.executemany(
+                "INSERT INTO export_jobs (source_path, image_path, export_path, exif, max_width, max_height, quality, heic, "
+                "profile) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self._relative(job['source']), self._relative(job['image_path']), self._relative(job['export_path']),
+                  job['exif'], job['max_width'],
+                  job['max_height'], job['quality'], int(job['heic']), job['profile']) for job in jobs]
+            )
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error queuing exports: {e}")
+            return False
+    
+    def get_export_jobs(self, after_id=0, limit=100):
+        """Return up to limit queued export jobs with an id above after_id, oldest first."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT id, source_path, image_path, export_path, exif, max_width, max_height, quality, heic, profile "
+                "FROM export_jobs WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit)
+            )
+            return [{'id': row[0], 'source': self._absolute(row[1]), 'image_path': self._absolute(row[2]),
+                     'export_path': self._absolute(row[3]),
+                     'exif': row[4], 'max_width': row[5], 'max_height': row[6], 'quality': row[7],
+                     'heic': bool(row[8]), 'profile': row[9]} for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error reading export queue: {e}")
+            return []
+    
+    def count_export_jobs(self):
+        """Return the number of queued export jobs."""
+        try:
+            return self.conn.execute("SELECT COUNT(*) FROM export_jobs").fetchone()[0]
+        except Exception as e:
+            print(f"Error reading export queue: {e}")
+            return 0
+    
+    def remove_export_job(self, job_id):
+        """Remove a finished export job from the queue."""
+        try:
+            self.conn.execute("DELETE FROM export_jobs WHERE id = ?", (job_id,))
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error removing export job: {e}")
+            return False
+    
+    def get_file_hash(self, file_path):
+        """Return (file_hash, algorithm) of a cataloged file, or None."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT file_hash, algorithm FROM file_hashes WHERE file_path = ? LIMIT 1",
+                (self._relative(file_path),)
+            )
+            result = cursor.fetchone()
+            return (result[0].hex(), result[1]) if result else None
+        except Exception as e:
+            print(f"Error reading hash: {e}")
+            return None
+    
+    def get_indexed_export(self, source_hash, algorithm, max_width, max_height, quality, export_format):
+        """Return the path of an export made from this content with these settings, or None."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT export_path FROM export_index WHERE source_hash = ? AND algorithm = ? "
+                "AND max_width = ? AND max_height = ? AND quality = ? AND export_format = ?",
+                (source_hash, algorithm, max_width, max_height, quality, export_format)
+            )
+            result = cursor.fetchone()
+            return self._absolute(result[0]) if result else None
+        except Exception as e:
+            print(f"Error reading export index: {e}")
+            return None
+    
+    def add_indexed_export(self, source_hash, algorithm, max_width, max_height, quality, export_format,
+                           export_path, image_path, profile='export'):
+        """Record a created export, replacing any entry for the same export file."""
+        try:
+            with self._atomic():
+                self.conn.execute("DELETE FROM export_index WHERE export_path = ?", (self._relative(export_path),))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO export_index (source_hash, algorithm, max_width, max_height, quality, "
+                    "export_format, export_path, image_path, profile) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (source_hash, algorithm, max_width, max_height, quality, export_format,
+                     self._relative(export_path), self._relative(image_path), profile)
+                )
+            return True
+        except Exception as e:
+            print(f"Error updating export index: {e}")
+            return False
+    
+    def remove_indexed_export(self, export_path):
+        """Forget an export, e.g. when it could not be recreated."""
+        try:
+            self.conn.execute("DELETE FROM export_index WHERE export_path = ?", (self._relative(export_path),))
+            self._written()
+            return True
+        except Exception as e:
+            print(f"Error updating export index: {e}")
+            return False
+    
+    def get_stale_exports(self, profile, max_width, max_height, quality, export_format):
+        """Return [(image_path, export_path)] of a profile's exports made with other settings that are not queued yet."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT image_path, export_path FROM export_index "
+                "WHERE profile = ? AND NOT (max_width = ? AND max_height = ? AND quality = ? AND export_format = ?) "
+                "AND export_path NOT IN (SELECT export_path FROM export_jobs)",
+                (profile, max_width, max_height, quality, export_format)
+            )
+            return [(self._absolute(row[0]), self._absolute(row[1])) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error reading export index: {e}")
+            return []
+    
     def get_stats(self):
         """Get database statistics."""
         try:
@@ -70,7 +672,8 @@ class FileHashDB:
             return {"total_files": 0}
     
     def close(self):
-        """Close database connection."""
+        """Commit buffered writes and close database connection."""
         if self.conn:
+            self.flush()
             self.conn.close()
             self.conn = None
\ No newline at end of file
@@ -0,0 +1,91 @@
+import hashlib
+import math
+
+# Index kinds selectable with processing.dedup_index
+MODES = ('set', 'bloom')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over digest bytes.
+
+    Digests are already uniformly distributed, so bit positions are taken
+    from the digest itself by double hashing instead of rehashing it k times.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key):
+        if len(key) < 16:
+            key = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:16], 'little') | 1
+        return [(h1 + n * h2) % self.size for n in range(self.hashes)]
+
+
+class DedupIndex:
+    """In-memory index of cataloged digests, so most duplicate checks need no query.
+
+    'set' keeps every digest as raw bytes (32 per SHA-256 digest instead of
+    64 hex characters) and answers exactly. 'bloom' keeps about 10 bits per
+    digest; its rare false positives are settled by the catalog query that
+    fetches the original's path anyway. Entries are never removed: a stale
+    one only costs that query.
+    """
+
+    def __init__(self, mode='set', capacity=0):
+        self.mode = mode
+        self.count = 0
+        if mode == 'bloom':
+            # Sized with headroom for this run's additions; overfilling only raises the false positive rate
+            self.digests = BloomFilter(max(2 * capacity, 1000000))
+        else:
+            self.digests = {}
+
+    def add(self, file_hash, algorithm):
+        """Record a cataloged digest."""
+        key = self._key(file_hash)
+        if self.mode == 'bloom':
+            self.digests.add(key)
+        else:
+            self.digests.setdefault(algorithm, set()).add(key)
+        self.count += 1
+
+    def might_contain(self, file_hash, algorithm):
+        """Return False when no cataloged file has this digest; True means query the catalog."""
+        key = self._key(file_hash)
+        if self.mode == 'bloom':
+            return key in self.digests
+        return key in self.digests.get(algorithm, ())
+
+    def load(self, cursor, chunk=10000):
+        """Add the (file_hash, algorithm) rows of a catalog query."""
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            for file_hash, algorithm in rows:
+                self.add(file_hash, algorithm)
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def _key(file_hash):
+        """Raw digest bytes of a hex digest, as stored by the catalog."""
+        if isinstance(file_hash, bytes):
+            return file_hash
+        try:
+            return bytes.fromhex(file_hash)
+        except ValueError:
+            return file_hash.encode()
@@ -170,13 +170,40 @@ DEFAULT_CONFIG = {
         "preferred_release_types": ["album", "single", "ep"]
     },
     
+    # Duplicate catalog (zensort.db in the destination)
+    "catalog": {
+        "backend": "sqlite"
+    },
+    
     # General Processing Settings
     "processing": {
         "batch_size": 100,
+        "commit_interval_ms": 500,
         "parallel_processing": True,
         "max_workers": 4,
+        "dedup_workers": 4,
+        "export_workers": 2,
+        "export_queue_size": 50,
+        "device_read_limit": 4,
+        "device_write_limit": 8,
         "create_backups": False,
         "dry_run": False,
-        "verbose_logging": True
+        "verbose_logging": True,
+        "streaming_scan": True,
+        "scan_queue_size": 1000,
+        "scan_workers": 4,
+        "incremental_scan": True,
+        "hash_cache": True,
+        "hash_while_copy": True,
+        "size_prefilter": True,
+        "tiered_dedup": True,
+        "tiered_min_size_mb": 16,
+        "quick_hash_sample_kb": 1024,
+        "quick_hash_interior_samples": 3,
+        "hash_use_mmap": False,
+        "hash_mmap_threshold_mb": 64,
+        "hash_algorithm": "sha256",
+        "dedup_index": "set",
+        "rehash_catalog": False
     }
 }
\ No newline at end of file
@@ -25,7 +25,7 @@ class DocumentOrganizer:
             'ebook': ['epub', 'mobi', 'azw', 'azw3']
         })
     
-    def organize_document(self, file_path, base_dir):
+    def organize_document(self, file_path, base_dir, record=None):
         """Organize document by extension into appropriate subdirectory."""
         path = Path(file_path)
         extension = path.suffix.lower().lstrip('.')
@@ -42,7 +42,7 @@ class DocumentOrganizer:
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / path.name
         
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
     def _get_document_category(self, extension):
         """Get document category for given extension."""
@@ -51,6 +51,6 @@ class DocumentOrganizer:
                 return category
         return None
     
-    def _copy_file(self, src, dest):
+    def _copy_file(self, src, dest, record=None):
         """Copy file to destination with conflict resolution."""
-        return FileCopy.copy_with_conflict_resolution(src, dest)
\ No newline at end of file
+        return FileCopy.copy_with_conflict_resolution(src, dest, record)
\ No newline at end of file
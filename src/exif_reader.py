@@ -0,0 +1,244 @@
+import struct
+import logging
+from contextlib import nullcontext
+
+try:
+    from .file_scanner import HEADER_SIZE
+except ImportError:
+    from file_scanner import HEADER_SIZE
+
+logger = logging.getLogger('ZenSort')
+
+# TIFF tags needed for routing, by IFD
+IFD0_TAGS = {0x010F: 'Make', 0x0110: 'Model', 0x0131: 'Software', 0x0132: 'DateTime'}
+EXIF_IFD_TAGS = {0x9003: 'DateTimeOriginal', 0x9004: 'DateTimeDigitized'}
+EXIF_IFD_POINTER = 0x8769
+
+# ISOBMFF brands of HEIC/HEIF stills
+HEIF_BRANDS = (b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx', b'mif1', b'msf1', b'avif')
+
+
+def read_exif(file_path, header_size=HEADER_SIZE, source=None):
+    """Read the routing EXIF tags of a JPEG, TIFF or HEIC file from its header.
+
+    source is an already open binary file to read instead of file_path,
+    such as a FileRecord's HeaderFile. Returns {tag name: string}, empty
+    when the file has no EXIF, or None when the format isn't one of these
+    or the EXIF could not be located, so the caller can fall back to a
+    full parser.
+    """
+    try:
+        if source is not None:
+            source.seek(0)
+        with nullcontext(source) if source is not None else open(file_path, 'rb') as f:
+            header = f.read(header_size)
+            tiff = _find_tiff(header)
+            if isinstance(tiff, tuple):
+                # HEIC items can live beyond the header; read just the EXIF item
+                offset, length = tiff
+                f.seek(offset)
+                tiff = _heif_item_tiff(f.read(length))
+        if tiff is None:
+            return None
+        return parse_tiff(tiff) if tiff else {}
+    except Exception as e:
+        logger.debug(f"Header EXIF read failed for {file_path}: {e}")
+        return None
+
+
+def _find_tiff(header):
+    """Return the TIFF block of the EXIF in a file header.
+
+    b'' means the file has no EXIF, None an unsupported or unreadable file,
+    and (offset, length) a HEIC EXIF item outside the header.
+    """
+    if header[:2] == b'\xff\xd8':
+        return _jpeg_tiff(header)
+    if header[:4] in (b'II*\x00', b'MM\x00*'):
+        return header
+    if header[4:8] == b'ftyp' and header[8:12] in HEIF_BRANDS:
+        return _heif_tiff(header)
+    return None
+
+
+def _jpeg_tiff(data):
+    """Find the APP1 Exif segment by walking the JPEG markers before the image data."""
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte
+            pos += 1
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan: no EXIF before the image data
+            return b''
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return data[pos + 10:pos + 2 + length]
+        pos += 2 + length
+    # Ran out of header before finding the segment
+    return None
+
+
+def _boxes(data, start, end):
+    """Yield (type, payload start, box end) of the ISOBMFF boxes in data[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield box_type, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _heif_tiff(data):
+    """Locate the Exif item of a HEIF file through its meta box."""
+    for box_type, start, end in _boxes(data, 0, len(data)):
+        if box_type == b'meta':
+            # meta is a full box: skip version and flags
+            location = _heif_exif_location(data, start + 4, end)
+            if location is None:
+                return b''
+            offset, length = location
+            if offset + length <= len(data):
+                return _heif_item_tiff(data[offset:offset + length])
+            return location
+    return None
+
+
+def _heif_exif_location(data, start, end):
+    """Return (file offset, length) of the Exif item, or None if there is none."""
+    exif_id = None
+    locations = {}
+    for box_type, box_start, box_end in _boxes(data, start, end):
+        if box_type == b'iinf':
+            exif_id = _heif_exif_item_id(data, box_start, box_end)
+        elif box_type == b'iloc':
+            locations = _heif_item_locations(data, box_start, box_end)
+    if exif_id is None:
+        return None
+    return locations.get(exif_id)
+
+
+def _heif_exif_item_id(data, start, end):
+    """Return the ID of the item of type 'Exif' listed in an iinf box."""
+    version = data[start]
+    pos = start + 4 + (2 if version == 0 else 4)
+    for box_type, box_start, _ in _boxes(data, pos, end):
+        if box_type != b'infe' or data[box_start] < 2:
+            continue
+        if data[box_start] == 2:
+            item_id = struct.unpack('>H', data[box_start + 4:box_start + 6])[0]
+            item_type = data[box_start + 8:box_start + 12]
+        else:
+            item_id = struct.unpack('>I', data[box_start + 4:box_start + 8])[0]
+            item_type = data[box_start + 10:box_start + 14]
+        if item_type == b'Exif':
+            return item_id
+    return None
+
+
+def _heif_item_locations(data, start, end):
+    """Return {item ID: (file offset, length)} for single-extent items in an iloc box."""
+    version = data[start]
+    pos = start + 4
+    offset_size, length_size = data[pos] >> 4, data[pos] & 0x0F
+    base_offset_size, index_size = data[pos + 1] >> 4, data[pos + 1] & 0x0F
+    pos += 2
+    id_size = 4 if version == 2 else 2
+    count = _read_uint(data, pos, id_size)
+    pos += id_size
+    locations = {}
+    for _ in range(count):
+        item_id = _read_uint(data, pos, id_size)
+        pos += id_size
+        construction = 0
+        if version in (1, 2):
+            construction = _read_uint(data, pos, 2) & 0x0F
+            pos += 2
+        # Data reference index
+        pos += 2
+        base_offset = _read_uint(data, pos, base_offset_size)
+        pos += base_offset_size
+        extents = _read_uint(data, pos, 2)
+        pos += 2
+        for extent in range(extents):
+            if version in (1, 2):
+                pos += index_size
+            offset = _read_uint(data, pos, offset_size)
+            pos += offset_size
+            length = _read_uint(data, pos, length_size)
+            pos += length_size
+            # Only items stored in the file itself as one extent are located
+            if extent == 0 and extents == 1 and construction == 0:
+                locations[item_id] = (base_offset + offset, length)
+    return locations
+
+
+def _heif_item_tiff(item):
+    """Return the TIFF block of a HEIF Exif item, which starts with the offset of its TIFF header."""
+    if len(item) < 4:
+        return b''
+    return item[4 + struct.unpack('>I', item[:4])[0]:]
+
+
+def _read_uint(data, pos, size):
+    """Read a big-endian unsigned integer of 0, 2, 4 or 8 bytes."""
+    if size == 0:
+        return 0
+    return int.from_bytes(data[pos:pos + size], 'big')
+
+
+def parse_tiff(tiff):
+    """Return the routing tags of a TIFF/EXIF block as {tag name: string}.
+
+    Only IFD0 and the Exif IFD are read, and values outside the block are
+    skipped, so a truncated block still yields the tags it contains.
+    """
+    if tiff[:2] == b'II':
+        order = '<'
+    elif tiff[:2] == b'MM':
+        order = '>'
+    else:
+        return {}
+    tags = {}
+    ifd0 = struct.unpack(order + 'I', tiff[4:8])[0]
+    exif_ifd = _read_ifd(tiff, ifd0, order, IFD0_TAGS, tags)
+    if exif_ifd:
+        _read_ifd(tiff, exif_ifd, order, EXIF_IFD_TAGS, tags)
+    return tags
+
+
+def _read_ifd(tiff, offset, order, wanted, tags):
+    """Store the wanted ASCII tags of one IFD in tags; returns the Exif IFD offset if present."""
+    if offset + 2 > len(tiff):
+        return None
+    count = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+    exif_ifd = None
+    for n in range(count):
+        entry = offset + 2 + n * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, value_type, value_count = struct.unpack(order + 'HHI', tiff[entry:entry + 8])
+        if tag == EXIF_IFD_POINTER and value_type in (4, 13):
+            exif_ifd = struct.unpack(order + 'I', tiff[entry + 8:entry + 12])[0]
+        elif tag in wanted and value_type == 2:
+            # ASCII values of up to 4 bytes are stored in the entry itself
+            if value_count <= 4:
+                start = entry + 8
+            else:
+                start = struct.unpack(order + 'I', tiff[entry + 8:entry + 12])[0]
+            if start + value_count > len(tiff):
+                continue
+            value = tiff[start:start + value_count].split(b'\x00', 1)[0]
+            tags[wanted[tag]] = value.decode('utf-8', 'replace').strip()
+    return exif_ifd
@@ -32,13 +32,16 @@ class FFmpegHandler:
             logger.error(f"HEIC to JPEG conversion failed for {heic_path}: {e}")
             return False
     
-    def extract_video_metadata(self, video_path):
-        """Extract video metadata using PyAV."""
+    def extract_video_metadata(self, video_path, source=None):
+        """Extract video metadata using PyAV.
+        
+        source is an open binary file to demux instead of video_path.
+        """
         if not self.available:
             return {}
             
         try:
-            with av.open(video_path) as container:
+            with av.open(source if source is not None else video_path) as container:
                 metadata = {
                     'duration': None,
                     'width': None,
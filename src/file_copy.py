@@ -1,39 +1,120 @@
+import os
 import shutil
+import stat
 from pathlib import Path
 import logging
 
 logger = logging.getLogger('ZenSort')
 
 
+class DuplicateFileError(Exception):
+    """Raised when the digest computed while copying matches a cataloged file."""
+
+    def __init__(self, original):
+        super().__init__(f"duplicate of {original}")
+        self.original = original
+
+
+class CopyCancelled(Exception):
+    """Raised when a copy is abandoned because the run was stopped."""
+
+
+class CopyHash:
+    """Hash state fed by FileCopy during a copy, so the source is only read once.
+
+    check_duplicate(digest) is called once the copy is complete; when it
+    returns a path, the new destination is removed and DuplicateFileError
+    is raised. The destination is also removed when check_duplicate raises.
+    """
+
+    def __init__(self, hash_object, check_duplicate=None):
+        self.hash_object = hash_object
+        self.check_duplicate = check_duplicate
+        self.digest = None
+
+
 class FileCopy:
+    BUFFER_SIZE = 1024 * 1024
+
     @staticmethod
-    def copy_with_conflict_resolution(src, dest):
-        """Copy file handling naming conflicts with -- n suffix."""
+    def copy_with_conflict_resolution(src, dest, record=None):
+        """Copy file handling naming conflicts with -- n suffix.
+
+        When the source's FileRecord is given, its stat snapshot is used for
+        the copied metadata instead of stat'ing the source again, and its
+        copy_hash (if any) is fed with the copied data.
+        """
+        src_path = Path(src)
+        dest_path = Path(dest)
         try:
-            src_path = Path(src)
-            dest_path = Path(dest)
-            
-            # If destination doesn't exist, copy directly
-            if not dest_path.exists():
-                shutil.copy2(src_path, dest_path)
-                return str(dest_path)
-            
-            # Handle naming conflict
-            counter = 1
+            counter = 0
             stem = dest_path.stem
             suffix = dest_path.suffix
             parent = dest_path.parent
-            
+            new_dest = dest_path
+
             while True:
-                new_name = f"{stem} -- {counter}{suffix}"
-                new_dest = parent / new_name
-                
-                if not new_dest.exists():
-                    shutil.copy2(src_path, new_dest)
+                try:
+                    FileCopy._copy_exclusive(src_path, new_dest, record)
                     return str(new_dest)
-                
-                counter += 1
-                
+                except FileExistsError:
+                    # Handle naming conflict
+                    counter += 1
+                    new_dest = parent / f"{stem} -- {counter}{suffix}"
+
+        except (DuplicateFileError, CopyCancelled):
+            raise
         except Exception as e:
             logger.error(f"Error copying file from {src_path} to {dest_path}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def _copy_exclusive(src_path, dest_path, record=None):
+        """Copy into a destination that must not exist yet, then copy metadata."""
+        copy_hash = record.copy_hash if record is not None else None
+
+        # A record's header already read for parsing is copied from memory
+        source = record.open() if record is not None else open(src_path, 'rb')
+
+        # 'xb' creates the destination atomically, replacing a separate exists() check
+        with source as fsrc:
+            with open(dest_path, 'xb') as fdst:
+                try:
+                    if copy_hash is not None:
+                        FileCopy._copy_hashing(fsrc, fdst, copy_hash)
+                    else:
+                        shutil.copyfileobj(fsrc, fdst, FileCopy.BUFFER_SIZE)
+                except BaseException:
+                    fdst.close()
+                    os.unlink(dest_path)
+                    raise
+
+        if copy_hash is not None and copy_hash.check_duplicate:
+            try:
+                original = copy_hash.check_duplicate(copy_hash.digest)
+            except BaseException:
+                os.unlink(dest_path)
+                raise
+            if original:
+                os.unlink(dest_path)
+                raise DuplicateFileError(original)
+
+        if record is not None:
+            os.utime(dest_path, ns=(record.atime_ns, record.mtime_ns))
+            os.chmod(dest_path, stat.S_IMODE(record.mode))
+        else:
+            shutil.copystat(src_path, dest_path)
+
+    @staticmethod
+    def _copy_hashing(fsrc, fdst, copy_hash):
+        """Copy an open file while feeding every chunk to the hash object."""
+        hash_object = copy_hash.hash_object
+        view = memoryview(bytearray(FileCopy.BUFFER_SIZE))
+        while True:
+            n = fsrc.readinto(view)
+            if not n:
+                break
+            chunk = view[:n]
+            hash_object.update(chunk)
+            fdst.write(chunk)
+        copy_hash.digest = hash_object.hexdigest()
@@ -0,0 +1,137 @@
+import hashlib
+import mmap
+import threading
+import logging
+
+logger = logging.getLogger('ZenSort')
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+DEFAULT_ALGORITHM = 'sha256'
+
+# Hash object factories by catalog name; the optional ones need their module
+ALGORITHMS = {
+    'sha256': hashlib.sha256,
+    'blake2b': hashlib.blake2b,
+}
+if XXHASH_AVAILABLE:
+    ALGORITHMS['xxh3_128'] = xxhash.xxh3_128
+    ALGORITHMS['xxh64'] = xxhash.xxh64
+if BLAKE3_AVAILABLE:
+    ALGORITHMS['blake3'] = blake3.blake3
+
+
+def available_algorithms():
+    """Return the names of the hash algorithms usable in this environment."""
+    return list(ALGORITHMS)
+
+
+class FileHasher:
+    """Content hashing with reusable per-thread buffers.
+
+    Reads go through readinto() on a preallocated buffer, so hashing a file
+    costs one Python-level iteration per chunk instead of one allocation per
+    4 KB. hashlib releases the GIL while digesting large buffers, so a
+    single FileHasher can be shared by several worker threads.
+
+    Digests of different algorithms are never comparable, so callers store
+    self.algorithm next to each digest.
+    """
+
+    SMALL_CHUNK = 64 * 1024
+    MEDIUM_CHUNK = 256 * 1024
+    LARGE_CHUNK = 1024 * 1024
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, use_mmap=False, mmap_threshold_mb=64):
+        if algorithm not in ALGORITHMS:
+            logger.warning(f"Hash algorithm '{algorithm}' is not available, using {DEFAULT_ALGORITHM}")
+            algorithm = DEFAULT_ALGORITHM
+        self.algorithm = algorithm
+        self._factory = ALGORITHMS[algorithm]
+        self.use_mmap = use_mmap
+        self.mmap_threshold = mmap_threshold_mb * 1024 * 1024
+        self._local = threading.local()
+
+    def new(self):
+        """Return a fresh hash object for the configured algorithm."""
+        return self._factory()
+
+    def hash_file(self, file_path, file_size=None, source=None):
+        """Return the hex digest of a whole file.
+
+        source is an open binary file to read instead of file_path, such as
+        a FileRecord's HeaderFile, whose header is hashed from memory before
+        reading continues from the file past it.
+        """
+        hasher = self.new()
+        if source is not None and not (self.use_mmap and file_size is not None
+                                       and file_size >= self.mmap_threshold):
+            source.seek(0)
+            self._update_from(source, hasher, self.chunk_size(file_size or 0))
+            return hasher.hexdigest()
+        with open(file_path, 'rb', buffering=0) as f:
+            if file_size is None:
+                file_size = f.seek(0, 2)
+                f.seek(0)
+            if self.use_mmap and file_size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+            else:
+                self._update_from(f, hasher, self.chunk_size(file_size))
+        return hasher.hexdigest()
+
+    def hash_samples(self, file_path, offsets, sample_size, prefix=b''):
+        """Return the hex digest of fixed-size samples read at the given offsets."""
+        hasher = self.new()
+        hasher.update(prefix)
+        view = self._buffer(sample_size)
+        with open(file_path, 'rb', buffering=0) as f:
+            for offset in offsets:
+                f.seek(offset)
+                hasher.update(view[:self._read_full(f, view)])
+        return hasher.hexdigest()
+
+    def chunk_size(self, file_size):
+        """Pick a read size: small files are read in one call, large files in 1 MB chunks."""
+        if file_size <= self.SMALL_CHUNK:
+            return self.SMALL_CHUNK
+        if file_size <= 16 * 1024 * 1024:
+            return self.MEDIUM_CHUNK
+        return self.LARGE_CHUNK
+
+    def _update_from(self, f, hasher, chunk_size):
+        """Feed the rest of an open file into a hash object."""
+        view = self._buffer(chunk_size)
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            hasher.update(view[:n])
+
+    def _read_full(self, f, view):
+        """Fill a buffer unless EOF comes first; returns the bytes read."""
+        total = 0
+        while total < len(view):
+            n = f.readinto(view[total:])
+            if not n:
+                break
+            total += n
+        return total
+
+    def _buffer(self, size):
+        """Return a memoryview of this thread's reusable buffer, grown as needed."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) < size:
+            buffer = bytearray(size)
+            self._local.buffer = buffer
+        return memoryview(buffer)[:size]
@@ -1,5 +1,5 @@
-import hashlib
 import os
+import threading
 from pathlib import Path
 import logging
 
@@ -11,7 +11,9 @@ try:
     from .video_organizer import VideoOrganizer
     from .audio_organizer import AudioOrganizer
     from .document_organizer import DocumentOrganizer
-    from .file_copy import FileCopy
+    from .file_copy import FileCopy, CopyHash, DuplicateFileError, CopyCancelled
+    from .file_scanner import FileRecord
+    from .file_hasher import FileHasher
 except ImportError:
     from file_detector import FileDetector
     from file_skipper import FileSkipper
@@ -19,10 +21,33 @@ except ImportError:
     from video_organizer import VideoOrganizer
     from audio_organizer import AudioOrganizer
     from document_organizer import DocumentOrganizer
-    from file_copy import FileCopy
+    from file_copy import FileCopy, CopyHash, DuplicateFileError, CopyCancelled
+    from file_scanner import FileRecord
+    from file_hasher import FileHasher
+
+
+class CheckedFile:
+    """A file on its way from the dedup stage to the copy stage."""
+    
+    __slots__ = ('record', 'result', 'needs_digest', 'file_hash', 'quick_hash', 'reserved', 'claim')
+    
+    def __init__(self, record=None):
+        self.record = record
+        # Final result when the file needs no copy: skipped, duplicate or failed
+        self.result = None
+        # Whether cataloged files may have the same content
+        self.needs_digest = False
+        # Catalog digest; None when deferred or hashed while copying
+        self.file_hash = None
+        self.quick_hash = None
+        # Digests reserved and the (size, fingerprint) claim, held until cataloged
+        self.reserved = []
+        self.claim = None
 
 
 class FileOrganizer:
+    SIZE_LOCK_STRIPES = 256
+    
     def __init__(self, config, database, audio_handler, music_enhancer=None):
         self.database = database
         self.detector = FileDetector()
@@ -34,6 +59,39 @@ class FileOrganizer:
         self.executables_dir = directories.get('executables', 'Executables')
         self.others_dir = directories.get('others', 'Others')
         
+        # Cache processing settings
+        processing = config.get('processing', {})
+        self.incremental_scan = processing.get('incremental_scan', True)
+        self.hash_cache = processing.get('hash_cache', True)
+        self.hash_while_copy = processing.get('hash_while_copy', True)
+        self.size_prefilter = processing.get('size_prefilter', True)
+        self.tiered_dedup = processing.get('tiered_dedup', True)
+        self.tiered_min_size = processing.get('tiered_min_size_mb', 16) * 1024 * 1024
+        self.quick_sample_size = processing.get('quick_hash_sample_kb', 1024) * 1024
+        self.quick_interior_samples = processing.get('quick_hash_interior_samples', 3)
+        self.hasher = FileHasher(
+            processing.get('hash_algorithm', 'sha256'),
+            use_mmap=processing.get('hash_use_mmap', False),
+            mmap_threshold_mb=processing.get('hash_mmap_threshold_mb', 64)
+        )
+        # Falls back to SHA-256 when the configured algorithm is unavailable
+        self.algorithm = self.hasher.algorithm
+        # Fingerprints sampled with other settings or another algorithm are not comparable
+        self.quick_prefix = f"{self.algorithm}:{self.quick_sample_size // 1024}k{self.quick_interior_samples}:"
+        
+        # Striped by file size; identical content always has the same size.
+        # Held only while a size's catalog entries are checked, not while copying
+        self.size_locks = [threading.Lock() for _ in range(self.SIZE_LOCK_STRIPES)]
+        
+        # Files other workers are organizing right now: digests reserved by a
+        # copy in progress, and (size, fingerprint) claims of files cataloged
+        # without a digest. Both are held until the file is cataloged
+        self.in_flight = threading.Condition()
+        self.reserved_digests = set()
+        self.claims = set()
+        # Called while waiting for another worker's reservation; True gives up the copy
+        self.should_stop = None
+        
         # Initialize organizers
         self.image_organizer = ImageOrganizer(config)
         self.video_organizer = VideoOrganizer(config)
@@ -41,74 +99,388 @@ class FileOrganizer:
         self.document_organizer = DocumentOrganizer(config)
     
     def process_file(self, file_path, base_dir):
-        """Process a single file through the complete workflow."""
+        """Process a single file (path or FileRecord) through the complete workflow."""
+        checked = self.check_file(file_path)
+        if checked.result is not None:
+            return checked.result
+        return self.copy_file(checked, base_dir)
+    
+    def check_file(self, file_path):
+        """Dedup stage: skip rules, duplicate checks and digest reservation.
+        
+        Reads the source only to fingerprint or hash it. Returns a
+        CheckedFile whose result is set when the file needs no copy; any
+        other must be passed to copy_file(), or to release() if dropped.
+        """
+        checked = CheckedFile()
         try:
-            # Get file info
-            file_size = os.path.getsize(file_path)
+            # Get file info, reusing the scan's stat when available
+            if isinstance(file_path, FileRecord):
+                record = file_path
+            else:
+                record = FileRecord.from_path(file_path)
+            checked.record = record
+            file_path = record.path
             
             # Check if file should be skipped
-            if self.skipper.should_skip_file(file_path, file_size):
+            if self.skipper.should_skip_file(file_path, record.size):
                 logger.info(f"Skipped: {file_path}")
-                return {'status': 'skipped', 'reason': 'skip_pattern'}
+                checked.result = {'status': 'skipped', 'reason': 'skip_pattern'}
             
-            # Generate file hash
-            file_hash = self._generate_hash(file_path)
-            if not file_hash:
-                return {'status': 'error', 'reason': 'hash_generation_failed'}
+            # Skip files handled by a previous run that have not changed since
+            elif self.incremental_scan and self.database.is_file_unchanged(
+                    file_path, record.size, record.mtime_ns, record.inode):
+                checked.result = {'status': 'skipped', 'reason': 'unchanged'}
             
-            # Check for duplicates
-            duplicate_path = self.database.check_duplicate(file_hash)
-            if duplicate_path:
-                logger.info(f"Duplicate: {file_path} -> {duplicate_path}")
-                return {'status': 'duplicate', 'original': duplicate_path}
+            else:
+                checked.result = self._check_record(checked)
+                
+        except Exception as e:
+            logger.error(f"Processing error: {file_path} - {e}")
+            checked.result = {'status': 'error', 'reason': str(e)}
+        
+        if checked.result is not None:
+            self.release(checked)
+        return checked
+    
+    def _check_record(self, checked):
+        """Check a file against the catalog; returns its result if it needs no copy, else None.
+        
+        Hashing, metadata parsing and copying all read through record.open(),
+        so the first of them reads the header and the rest take it from memory
+        until release().
+        """
+        record = checked.record
+        dedup, checked.claim = self._check_size(record)
+        if dedup is None:
+            return {'status': 'error', 'reason': 'hash_generation_failed'}
+        needs_digest, file_hash, checked.quick_hash = dedup
+        checked.needs_digest = needs_digest
+        
+        # file_hash stays None when the file cannot be a duplicate and its
+        # catalog hash can wait, or when it is hashed while copying
+        if needs_digest:
+            if file_hash is None and not self.hash_while_copy:
+                file_hash = self._hash_and_cache(record)
+                if not file_hash:
+                    return {'status': 'error', 'reason': 'hash_generation_failed'}
+            if file_hash is not None:
+                # Only looked up here; the digest is reserved once the copy starts
+                duplicate_path = self._find_duplicate(file_hash)
+                if duplicate_path:
+                    logger.info(f"Duplicate: {record.path} -> {duplicate_path}")
+                    self._remember_scanned(record)
+                    return {'status': 'duplicate', 'original': duplicate_path}
+            else:
+                # Hash during the copy instead of reading the source a second
+                # time; a duplicate digest discards the new destination
+                record.copy_hash = CopyHash(self.hasher.new(),
+                                            lambda digest: self._reserve_digest(digest, checked.reserved))
+        elif file_hash is None and self.hash_while_copy:
+            # Cannot be a duplicate, but the copy still yields its catalog hash
+            record.copy_hash = CopyHash(self.hasher.new())
+        checked.file_hash = file_hash
+        return None
+    
+    def copy_file(self, checked, base_dir):
+        """Copy stage: route a checked file to its organizer and catalog it.
+        
+        Returns None instead of a result when the run is stopped while the
+        file waits for another worker's copy of the same content.
+        """
+        record = checked.record
+        file_path = record.path
+        file_hash = checked.file_hash
+        try:
+            # Reserved only now, so whoever waits for this reservation waits
+            # for a copy in progress, never for a file still queued
+            if checked.needs_digest and file_hash is not None:
+                duplicate_path = self._reserve_digest(file_hash, checked.reserved)
+                if duplicate_path:
+                    logger.info(f"Duplicate: {file_path} -> {duplicate_path}")
+                    self._remember_scanned(record)
+                    return {'status': 'duplicate', 'original': duplicate_path}
             
             # Detect file type
             file_type = self.detector.detect_file_type(file_path)
             
             # Route to appropriate organizer
-            result_path = self._route_file(file_path, file_type, base_dir)
+            try:
+                result_path = self._route_file(file_path, file_type, base_dir, record)
+            except DuplicateFileError as e:
+                logger.info(f"Duplicate: {file_path} -> {e.original}")
+                self._cache_hash(record, record.copy_hash.digest)
+                self._remember_scanned(record)
+                return {'status': 'duplicate', 'original': e.original}
             
             if result_path:
+                if file_hash is None and record.copy_hash is not None and record.copy_hash.digest:
+                    file_hash = record.copy_hash.digest
+                    self._cache_hash(record, file_hash)
+                
                 # Add to database
-                self.database.add_hash(result_path, file_hash, file_size)
+                if file_hash:
+                    self.database.add_hash(result_path, file_hash, record.size, checked.quick_hash, self.algorithm)
+                else:
+                    self.database.add_pending(result_path, record.size, checked.quick_hash)
+                self._remember_scanned(record)
                 return {'status': 'processed', 'type': file_type, 'destination': result_path}
             else:
                 logger.error(f"Organization failed: {file_path}")
                 return {'status': 'error', 'reason': 'organization_failed'}
                 
+        except CopyCancelled:
+            return None
         except Exception as e:
             logger.error(f"Processing error: {file_path} - {e}")
             return {'status': 'error', 'reason': str(e)}
+        finally:
+            self.release(checked)
+    
+    def _size_lock(self, file_size):
+        """Return the lock serializing duplicate checks for files of this size."""
+        return self.size_locks[file_size % len(self.size_locks)]
+    
+    def _check_size(self, record):
+        """Run the duplicate checks that depend on the file's size alone.
+        
+        Returns ((needs_digest, file_hash, quick_hash), claim), with None
+        instead of the tuple if fingerprinting failed. needs_digest is False
+        when no cataloged file can have the same content. Such a file claims
+        its (size, fingerprint) until release(), or its whole size when it
+        has no fingerprint, and other files matching the claim wait for it,
+        as they have to compare against its catalog entry. file_hash is the
+        cached hash, if any.
+        """
+        file_size = record.size
+        whole_size = (file_size, None)
+        claim = whole_size
+        while True:
+            with self.in_flight:
+                self.in_flight.wait_for(lambda: whole_size not in self.claims and claim not in self.claims)
+            with self._size_lock(file_size):
+                # Claims are only made under the size lock, so this check holds until it is released
+                with self.in_flight:
+                    if whole_size in self.claims:
+                        continue
+                dedup = self._check_size_entries(record)
+                if dedup is None or dedup[0]:
+                    return dedup, None
+                claim = (file_size, dedup[2])
+                with self.in_flight:
+                    if claim not in self.claims:
+                        self.claims.add(claim)
+                        return dedup, claim
+            # A file with the same size and fingerprint is in flight; wait for its catalog entry
+    
+    def _check_size_entries(self, record):
+        """Compare a file against the catalog entries of its size; see _check_size."""
+        file_size = record.size
+        file_hash = self._get_cached_hash(record)
+        if self.size_prefilter and not self.database.has_size(file_size):
+            # No known file has this size, so this one cannot be a duplicate
+            return False, file_hash, None
+        
+        quick_hash = None
+        if file_hash is None and self._use_tiered(file_size):
+            # Compare a sampled fingerprint before reading the whole file
+            quick_hash = self._quick_fingerprint(record.path, file_size)
+            if not quick_hash:
+                return None
+            self._fill_quick_hashes(file_size)
+            if not self.database.has_quick_hash(quick_hash):
+                return False, None, quick_hash
+            self._resolve_pending(file_size, quick_hash)
+            self._rehash_stale(file_size, quick_hash)
+        else:
+            # Earlier files of the same size must be hashed before comparing
+            self._resolve_pending(file_size)
+            self._rehash_stale(file_size)
+        return True, file_hash, quick_hash
+    
+    def _reserve_digest(self, file_hash, reserved):
+        """Return the cataloged path with this digest, or reserve the digest and return None.
+        
+        A digest reserved by another worker belongs to a file being copied,
+        so this waits for it to be cataloged and checks the catalog again;
+        CopyCancelled is raised if the run is stopped meanwhile. Reserved
+        digests are appended to reserved.
+        """
+        with self.in_flight:
+            while file_hash in self.reserved_digests:
+                if self.should_stop and self.should_stop():
+                    raise CopyCancelled(file_hash)
+                self.in_flight.wait(0.1)
+            original = self._find_duplicate(file_hash)
+            if original is None:
+                self.reserved_digests.add(file_hash)
+                reserved.append(file_hash)
+            return original
+    
+    def release(self, checked):
+        """Release a file's digest reservations, claim and header once it is cataloged or dropped."""
+        if checked.reserved or checked.claim:
+            with self.in_flight:
+                self.reserved_digests.difference_update(checked.reserved)
+                self.claims.discard(checked.claim)
+                self.in_flight.notify_all()
+            checked.reserved = []
+            checked.claim = None
+        if checked.record is not None:
+            checked.record.release()
+    
+    def _remember_scanned(self, record):
+        """Record a handled file so unchanged copies are skipped on the next run."""
+        if self.incremental_scan:
+            self.database.add_scan_file(record.path, record.size, record.mtime_ns, record.inode)
+    
+    def hash_pending(self, should_stop=None):
+        """Hash organized files whose hash was deferred by the size pre-filter.
+        
+        Large files covered by tiered dedup are left pending; they are only
+        fully hashed when a later file matches their fingerprint.
+        Returns the number of catalog entries completed.
+        """
+        completed = 0
+        for dest_path, file_size, _ in self.database.get_pending():
+            if should_stop and should_stop():
+                break
+            if self._use_tiered(file_size):
+                continue
+            if self._resolve_pending_file(dest_path):
+                completed += 1
+        return completed
+    
+    def catalog_hash(self, dest_path):
+        """Return (file_hash, algorithm) of an organized file, hashing it now if its hash was deferred."""
+        file_hash = self.database.get_file_hash(dest_path)
+        if file_hash is None and self._resolve_pending_file(dest_path):
+            file_hash = self.database.get_file_hash(dest_path)
+        return file_hash
+    
+    def _find_duplicate(self, file_hash):
+        """Return the cataloged path with this digest, or None."""
+        return self.database.check_duplicate(file_hash, self.algorithm)
+    
+    def _use_tiered(self, file_size):
+        """Check whether a file is large enough for fingerprint-first dedup."""
+        return self.tiered_dedup and file_size >= self.tiered_min_size
+    
+    def _fill_quick_hashes(self, file_size):
+        """Fingerprint cataloged files of this size that have no comparable fingerprint yet."""
+        for dest_path in self.database.get_missing_quick_hashes(file_size, self.quick_prefix):
+            if os.path.exists(dest_path):
+                quick_hash = self._quick_fingerprint(dest_path, file_size)
+                if quick_hash:
+                    self.database.set_quick_hash(dest_path, quick_hash)
+    
+    def _quick_fingerprint(self, file_path, file_size):
+        """Hash the size plus head, tail and evenly spaced interior samples of a file."""
+        try:
+            sample = self.quick_sample_size
+            offsets = [0]
+            step = file_size // (self.quick_interior_samples + 1)
+            offsets.extend(step * i for i in range(1, self.quick_interior_samples + 1))
+            offsets.append(max(file_size - sample, 0))
+            
+            digest = self.hasher.hash_samples(file_path, offsets, sample, str(file_size).encode())
+            return self.quick_prefix + digest
+        except Exception as e:
+            logger.error(f"Error generating fingerprint for {file_path}: {e}")
+            return None
+    
+    def _resolve_pending(self, file_size, quick_hash=None):
+        """Hash deferred files of one size (and fingerprint) so they take part in duplicate checks."""
+        for dest_path, _, _ in self.database.get_pending(file_size, quick_hash):
+            self._resolve_pending_file(dest_path)
+    
+    def _resolve_pending_file(self, dest_path):
+        """Hash one deferred destination file and move it into the hash catalog."""
+        if not os.path.exists(dest_path):
+            logger.warning(f"Deferred catalog entry no longer exists: {dest_path}")
+            self.database.discard_pending(dest_path)
+            return False
+        file_hash = self._generate_hash(dest_path)
+        if not file_hash:
+            return False
+        return self.database.resolve_pending(dest_path, file_hash, self.algorithm)
+    
+    def rehash_stale(self, should_stop=None):
+        """Re-hash catalog entries stored with another algorithm, e.g. after changing hash_algorithm.
+        
+        Each entry is updated as soon as it is hashed, so a stopped migration
+        resumes where it left off. Returns the number of entries migrated.
+        """
+        migrated = 0
+        for dest_path, _ in self.database.get_stale_hashes(self.algorithm):
+            if should_stop and should_stop():
+                break
+            if self._rehash_catalog_file(dest_path):
+                migrated += 1
+        return migrated
+    
+    def _rehash_stale(self, file_size, quick_hash=None):
+        """Re-hash cataloged files of one size (and fingerprint) whose digest is not comparable."""
+        for dest_path, _ in self.database.get_stale_hashes(self.algorithm, file_size, quick_hash):
+            self._rehash_catalog_file(dest_path)
+    
+    def _rehash_catalog_file(self, dest_path):
+        """Hash one cataloged destination file with the current algorithm."""
+        if not os.path.exists(dest_path):
+            logger.warning(f"Cataloged file no longer exists: {dest_path}")
+            self.database.remove_hash(dest_path)
+            return False
+        file_hash = self._generate_hash(dest_path)
+        if not file_hash:
+            return False
+        return self.database.update_hash(dest_path, file_hash, self.algorithm)
+    
+    def _get_cached_hash(self, record):
+        """Return the file's hash from the hash cache without reading the file, or None."""
+        # Some filesystems report no inode number; such files cannot be cached
+        if not (self.hash_cache and record.inode):
+            return None
+        return self.database.get_cached_hash(record.dev, record.inode, record.size, record.mtime_ns, self.algorithm)
+    
+    def _hash_and_cache(self, record):
+        """Read and hash the file, storing the result in the hash cache."""
+        file_hash = self._generate_hash(record.path, record.size, record)
+        self._cache_hash(record, file_hash)
+        return file_hash
+    
+    def _cache_hash(self, record, file_hash):
+        """Store a source file's hash in the hash cache."""
+        if file_hash and self.hash_cache and record.inode:
+            self.database.cache_hash(record.dev, record.inode, record.size, record.mtime_ns, file_hash, self.algorithm)
     
-    def _generate_hash(self, file_path):
-        """Generate SHA-256 hash of file."""
+    def _generate_hash(self, file_path, file_size=None, record=None):
+        """Generate the content hash of a file with the configured algorithm."""
         try:
-            hash_sha256 = hashlib.sha256()
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+            if record is not None:
+                with record.open() as source:
+                    return self.hasher.hash_file(file_path, file_size, source)
+            return self.hasher.hash_file(file_path, file_size)
         except Exception as e:
             logger.error(f"Error generating hash for {file_path}: {e}")
             return None
     
-    def _route_file(self, file_path, file_type, base_dir):
+    def _route_file(self, file_path, file_type, base_dir, record=None):
         """Route file to appropriate organizer."""
         if file_type == 'image':
-            return self.image_organizer.organize_image(file_path, base_dir)
+            return self.image_organizer.organize_image(file_path, base_dir, record)
         elif file_type == 'video':
-            return self.video_organizer.organize_video(file_path, base_dir)
+            return self.video_organizer.organize_video(file_path, base_dir, record)
         elif file_type == 'audio':
-            return self.audio_organizer.organize_audio(file_path, base_dir)
+            return self.audio_organizer.organize_audio(file_path, base_dir, record)
         elif file_type == 'document':
-            return self.document_organizer.organize_document(file_path, base_dir)
+            return self.document_organizer.organize_document(file_path, base_dir, record)
         elif file_type in ['archive', 'executable']:
             # Handle other types with simple directory structure
-            return self._organize_other(file_path, file_type, base_dir)
+            return self._organize_other(file_path, file_type, base_dir, record)
         else:
-            return self._organize_other(file_path, 'unknown', base_dir)
+            return self._organize_other(file_path, 'unknown', base_dir, record)
     
-    def _organize_other(self, file_path, file_type, base_dir):
+    def _organize_other(self, file_path, file_type, base_dir, record=None):
         """Organize other file types into simple directories."""
         
         type_map = {
@@ -121,4 +493,4 @@ class FileOrganizer:
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
         
-        return FileCopy.copy_with_conflict_resolution(file_path, dest_path)
\ No newline at end of file
+        return FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
\ No newline at end of file
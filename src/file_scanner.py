@@ -0,0 +1,246 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import logging
+
+logger = logging.getLogger('ZenSort')
+
+# Bytes read once from the start of a file and shared by the metadata
+# parsers, hashing and the copy; JPEG EXIF segments are at most 64 KB
+HEADER_SIZE = 128 * 1024
+
+
+class FileRecord:
+    """Stat snapshot of a source file, taken once during the scan."""
+
+    __slots__ = ('path', 'size', 'mtime_ns', 'atime_ns', 'inode', 'dev', 'mode', 'copy_hash', 'header')
+
+    def __init__(self, path, size, mtime_ns, atime_ns, inode, dev, mode):
+        self.path = Path(path)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.atime_ns = atime_ns
+        self.inode = inode
+        self.dev = dev
+        self.mode = mode
+        # Optional CopyHash that FileCopy feeds while copying this file
+        self.copy_hash = None
+        # First HEADER_SIZE bytes of the file once open() has run
+        self.header = None
+
+    @classmethod
+    def from_stat(cls, path, st):
+        """Build a record from an existing stat result."""
+        return cls(path, st.st_size, st.st_mtime_ns, st.st_atime_ns, st.st_ino, st.st_dev, st.st_mode)
+
+    @classmethod
+    def from_path(cls, path):
+        """Stat a path and build its record."""
+        return cls.from_stat(path, os.stat(path))
+
+    @property
+    def mtime(self):
+        """Modification time in seconds."""
+        return self.mtime_ns / 1e9
+
+    def open(self):
+        """Open the file for reading, serving its header from memory.
+
+        When the header hasn't been read yet, it is read through the same
+        file handle the reader then continues with.
+        """
+        if self.header is not None:
+            return HeaderFile(self.path, self.header)
+        f = open(self.path, 'rb', buffering=0)
+        try:
+            self.header = f.read(HEADER_SIZE)
+        except BaseException:
+            f.close()
+            raise
+        return HeaderFile(self.path, self.header, f)
+
+    def release(self):
+        """Drop the cached header once the file has been handled."""
+        self.header = None
+
+    def __repr__(self):
+        return f"FileRecord({str(self.path)!r}, size={self.size})"
+
+
+class HeaderFile(io.RawIOBase):
+    """Read-only, seekable file whose first bytes come from an in-memory header.
+
+    The file itself is only opened once a read goes past the header, so
+    parsers that stop within it cost no I/O. A header shorter than
+    HEADER_SIZE is the whole file and the file is never opened.
+    """
+
+    def __init__(self, path, header, file=None):
+        super().__init__()
+        self.path = path
+        self.header = header
+        self.whole = len(header) < HEADER_SIZE
+        self.pos = 0
+        # Already open handle of the file, e.g. the one the header was read from
+        self._file = file
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        """Fill b from the header, then from the file past it."""
+        view = memoryview(b).cast('B')
+        n = 0
+        if self.pos < len(self.header):
+            n = min(len(view), len(self.header) - self.pos)
+            view[:n] = self.header[self.pos:self.pos + n]
+            self.pos += n
+        if n < len(view) and not self.whole:
+            f = self._open()
+            f.seek(self.pos)
+            while n < len(view):
+                read = f.readinto(view[n:])
+                if not read:
+                    break
+                n += read
+                self.pos += read
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.header) if self.whole else os.fstat(self._open().fileno()).st_size
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self.pos = offset
+        return offset
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+    def _open(self):
+        """Open the underlying file on first access past the header."""
+        if self._file is None:
+            self._file = open(self.path, 'rb', buffering=0)
+        return self._file
+
+
+class FileScanner:
+    # Directories listed ahead of the walk per worker when scanning in parallel
+    LOOKAHEAD_PER_WORKER = 4
+
+    def __init__(self, skipper, workers=1, known_dirs=None):
+        self.skipper = skipper
+        self.workers = max(1, int(workers or 1))
+        # Directory mtimes from the previous run; files of unchanged directories are not listed
+        self.known_dirs = known_dirs
+        # Directory mtimes observed by the last scan(), for persisting after the run
+        self.dir_mtimes = {}
+
+    def scan(self, root):
+        """Yield a FileRecord for every non-skipped file, depth-first in name order."""
+        self.dir_mtimes = {}
+        return self._walk(root)
+
+    def _walk(self, root):
+        """Walk directories depth-first, serially or with a listing pool."""
+        if self.workers > 1:
+            yield from self._walk_parallel(root)
+            return
+
+        pending = [os.fspath(root)]
+        while pending:
+            files, subdirs = self._list_dir(pending.pop())
+            yield from files
+            # Reversed so the first subdirectory is visited next
+            pending.extend(reversed(subdirs))
+
+    def _walk_parallel(self, root):
+        """Same order as the serial walk, but upcoming directories are listed concurrently.
+
+        The next few directories on the stack (siblings first) are submitted
+        to the pool ahead of time, so listing round-trips overlap while files
+        are still emitted in the deterministic serial order.
+        """
+        lookahead = self.workers * self.LOOKAHEAD_PER_WORKER
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='zensort-scan') as pool:
+            # Each entry is [directory, future-or-None]
+            pending = [[os.fspath(root), None]]
+            try:
+                while pending:
+                    for item in pending[-lookahead:]:
+                        if item[1] is None:
+                            item[1] = pool.submit(self._list_dir, item[0])
+                    files, subdirs = pending.pop()[1].result()
+                    yield from files
+                    pending.extend([subdir, None] for subdir in reversed(subdirs))
+            finally:
+                # Drop queued listings when the consumer stops early
+                for item in pending:
+                    if item[1] is not None:
+                        item[1].cancel()
+
+    def _list_dir(self, dir_path):
+        """List one directory, returning (files, subdirectories) after skip pruning."""
+        files = []
+        subdirs = []
+        unchanged = self._check_dir_mtime(dir_path)
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"Cannot list directory {dir_path}: {e}")
+            self.dir_mtimes.pop(dir_path, None)
+            return files, subdirs
+
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    # Symlinked directories are listed but not followed, like os.walk
+                    if not entry.is_symlink() and not self.skipper.should_skip_directory(entry.name):
+                        subdirs.append(entry.path)
+                    continue
+                if unchanged or not entry.is_file():
+                    continue
+
+                # Sanitize filename to remove null characters
+                name = entry.name.replace('\x00', '')
+                if name != entry.name:
+                    logger.warning(f"Sanitized filename with null characters: {entry.name!r}")
+
+                if self.skipper.should_skip_file(name):
+                    continue
+
+                files.append(FileRecord.from_stat(os.path.join(dir_path, name), entry.stat()))
+            except OSError as e:
+                logger.warning(f"Cannot stat {entry.path}: {e}")
+                # Rescan this directory next time so the file is retried
+                self.dir_mtimes.pop(dir_path, None)
+
+        return files, subdirs
+
+    def _check_dir_mtime(self, dir_path):
+        """Return True when the directory's entries are unchanged since the previous run.
+
+        A directory mtime only covers its direct entries, so subdirectories
+        are still descended; only the directory's own files are skipped.
+        """
+        if self.known_dirs is None:
+            return False
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return False
+        self.dir_mtimes[dir_path] = mtime_ns
+        return self.known_dirs.get(dir_path) == mtime_ns
@@ -1,3 +1,4 @@
+import os
 import re
 from pathlib import Path
 
@@ -41,8 +42,8 @@ class FileSkipper:
         return False
     
     def should_skip_directory(self, dir_path):
-        """Check if directory should be skipped."""
-        dir_name = Path(dir_path).name
+        """Check if directory should be skipped. Accepts a path or a bare name."""
+        dir_name = os.path.basename(dir_path)
         return dir_name in self.ignore_dirs or (self.skip_hidden and dir_name.startswith('.'))
     
     def _skip_by_name(self, filename):
@@ -1,4 +1,6 @@
 import os
+import queue
+import threading
 import time
 from pathlib import Path
 
@@ -18,23 +20,26 @@ try:
     from .logger import ZenSortLogger
 except ImportError:
     from logger import ZenSortLogger
-try:
-    from .database import FileHashDB
-except ImportError:
-    try:
-        from database import FileHashDB
-    except ImportError:
-        from database_sqlite import FileHashDB
 try:
     from .config_manager import ConfigManager
     from .audio_handler import AudioHandler
     from .music_metadata import MusicMetadataEnhancer
     from .file_organizer import FileOrganizer as SingleFileOrganizer
+    from .file_scanner import FileScanner
+    from .locked_catalog import LockedCatalog
+    from .catalog import CATALOG_NAME, DEFAULT_BACKEND, catalog_backend, catalog_class
+    from .pipeline import Stage, Pipeline, DeviceQueue
+    from .image_export import ExportPool, create_export, export_task, EXPORT_FORMAT
 except ImportError:
     from config_manager import ConfigManager
     from audio_handler import AudioHandler
     from music_metadata import MusicMetadataEnhancer
     from file_organizer import FileOrganizer as SingleFileOrganizer
+    from file_scanner import FileScanner
+    from locked_catalog import LockedCatalog
+    from catalog import CATALOG_NAME, DEFAULT_BACKEND, catalog_backend, catalog_class
+    from pipeline import Stage, Pipeline, DeviceQueue
+    from image_export import ExportPool, create_export, export_task, EXPORT_FORMAT
 
 
 class FilesOrganizer:
@@ -52,16 +57,44 @@ class FilesOrganizer:
         # Initialize components
         self.database = None
         self.processor = None
+        self.scanner = None
         self.progress_callback = None
         self.logger = None
         
+        # Cache processing settings
+        processing = self.config.get('processing', {})
+        self.streaming_scan = processing.get('streaming_scan', True)
+        self.scan_queue_size = processing.get('scan_queue_size', 1000)
+        self.scan_workers = processing.get('scan_workers', 4)
+        self.incremental_scan = processing.get('incremental_scan', True)
+        self.rehash_catalog = processing.get('rehash_catalog', False)
+        self.parallel_processing = processing.get('parallel_processing', True)
+        self.max_workers = max(1, int(processing.get('max_workers', 4) or 1))
+        self.dedup_workers = max(1, int(processing.get('dedup_workers', 4) or 1))
+        self.batch_size = processing.get('batch_size', 100)
+        self.commit_interval_ms = processing.get('commit_interval_ms', 500)
+        self.dedup_index = processing.get('dedup_index', 'set')
+        self.export_workers = processing.get('export_workers', 2)
+        self.export_queue_size = processing.get('export_queue_size', 50)
+        self.device_read_limit = processing.get('device_read_limit', 4)
+        self.device_write_limit = processing.get('device_write_limit', 8)
+        self.catalog_backend = self.config.get('catalog', {}).get('backend', DEFAULT_BACKEND)
+        self.pipeline = None
+        self.scan_queue = None
+        self.export_pool = None
+        self.export_progress = {'completed': 0, 'total': 0}
+        self.failed_dirs = set()
+        
         # Statistics
         self.stats = {
             'processed': 0,
             'skipped': 0,
             'duplicates': 0,
             'errors': 0,
-            'total': 0
+            'total': 0,
+            'exports': 0,
+            'exports_cached': 0,
+            'export_errors': 0
         }
     
     def organize(self, progress_callback=None):
@@ -163,9 +196,28 @@ class FilesOrganizer:
     
     def _init_database(self):
         """Initialize database connection."""
-        db_path = self.dest_dir / 'zensort.db'
-        self.database = FileHashDB(db_path)
+        db_path = self.dest_dir / CATALOG_NAME
+        backend = catalog_backend(db_path, self.catalog_backend)
+        if backend != self.catalog_backend:
+            msg = f"Catalog {db_path} was created by the {backend} backend; using it instead of {self.catalog_backend}"
+            if self.logger:
+                self.logger.warning(msg)
+            else:
+                print(f"WARNING: {msg}")
+        try:
+            FileHashDB = catalog_class(backend)
+        except (ImportError, ValueError) as e:
+            msg = f"Catalog backend '{backend}' is not available: {e}"
+            if self.logger:
+                self.logger.error(msg)
+            else:
+                print(f"ERROR: {msg}")
+            return False
+        self.database = FileHashDB(db_path, self.batch_size, self.commit_interval_ms, self.dedup_index)
         success = self.database.connect()
+        if success and self._use_workers():
+            # Workers share one connection; calls are serialized through it
+            self.database = LockedCatalog(self.database)
         if success:
             msg = "Database initialized successfully"
             if self.logger:
@@ -196,6 +248,9 @@ class FilesOrganizer:
             audio_handler,
             music_enhancer
         )
+        self.processor.should_stop = lambda: self.stopped
+        known_dirs = self.database.load_scan_dirs() if self.incremental_scan else None
+        self.scanner = FileScanner(self.processor.skipper, self.scan_workers, known_dirs)
         msg = "File processor initialized successfully"
         if self.logger:
             self.logger.info(msg)
@@ -204,19 +259,24 @@ class FilesOrganizer:
     
     def _process_files(self):
         """Recursively process all files in source directory."""
-        # Count total files first
         msg = "Scanning source directory for files..."
         if self.logger:
             self.logger.info(msg)
         else:
             print(f"INFO: {msg}")
-        all_files = list(self._scan_files())
-        self.stats['total'] = len(all_files)
-        msg = f"Found {self.stats['total']} files to process"
-        if self.logger:
-            self.logger.info(msg)
+        
+        if self.streaming_scan:
+            # Files are consumed while the walk is still running
+            all_files = self._stream_files()
         else:
-            print(f"INFO: {msg}")
+            # Count total files first
+            all_files = list(self._scan_files())
+            self.stats['total'] = len(all_files)
+            msg = f"Found {self.stats['total']} files to process"
+            if self.logger:
+                self.logger.info(msg)
+            else:
+                print(f"INFO: {msg}")
         
         # Initialize timing
         start_time = time.time()
@@ -224,99 +284,496 @@ class FilesOrganizer:
         if self.progress_callback:
             self.progress_callback(0, self.stats['total'], self.stats, "0s", "0s")
         
-        # Process each file
-        for i, file_path in enumerate(all_files):
+        # Process each file; image exports are queued in the catalog
+        if self.processor.image_organizer.export_enabled:
+            self.processor.image_organizer.export_sink = self.database.add_export_jobs
+        try:
+            if self._use_workers():
+                self._process_parallel(all_files, start_time)
+            else:
+                self._process_serial(all_files, start_time)
+        finally:
+            self.processor.image_organizer.export_sink = None
+            # Whatever ended the phase, its catalog writes are committed now
+            self.database.flush()
+        
+        # Complete catalog entries deferred by the size pre-filter
+        if not self.stopped:
+            self._hash_pending()
+        
+        # A directory is only trusted on the next run if the whole scan finished
+        # and none of its files failed
+        if self.incremental_scan and not self.stopped:
+            dir_mtimes = {path: mtime for path, mtime in self.scanner.dir_mtimes.items()
+                          if path not in self.failed_dirs}
+            self.database.save_scan_dirs(dir_mtimes)
+        
+        # Create queued exports, including any left over from an interrupted run
+        if not self.stopped:
+            self._run_exports()
+        
+        # Migrate catalog entries hashed with a previously configured algorithm
+        if self.rehash_catalog and not self.stopped:
+            self._rehash_catalog()
+        
+        # Log final results
+        if self.logger:
+            if self.stopped:
+                self.logger.warning("Organization stopped by user")
+            else:
+                self.logger.info("Organization completed successfully")
+            
+            self.logger.info(f"Final statistics: {self.stats}")
+        
+        return not self.stopped
+    
+    def _wait_while_paused(self):
+        """Block while paused, committing buffered catalog writes first."""
+        if self.paused and not self.stopped:
+            self.database.flush()
+        while self.paused and not self.stopped:
+            time.sleep(0.1)
+    
+    def _use_workers(self):
+        """Check whether files are processed on a worker pool."""
+        return self.parallel_processing and self.max_workers > 1
+    
+    def _process_serial(self, all_files, start_time):
+        """Process files one at a time on this thread."""
+        for i, record in enumerate(all_files):
             if self.stopped:
                 break
             
             # Handle pause
-            while self.paused and not self.stopped:
-                time.sleep(0.1)
+            self._wait_while_paused()
             
             if self.stopped:
                 break
             
             # Process file
-            result = self.processor.process_file(file_path, self.dest_dir)
-            
-            # Calculate timing info
-            elapsed_time = time.time() - start_time
-            if i > 0:
-                avg_time_per_file = elapsed_time / (i + 1)
-                remaining_files = self.stats['total'] - (i + 1)
-                eta_seconds = avg_time_per_file * remaining_files
-            else:
-                eta_seconds = 0
-            
-            # Log file processing with aligned format
-            action = result['status'].upper().ljust(10)
-            file_path_str = str(file_path)
-            
-            # Format timing for human readability
-            elapsed_str = format_time(elapsed_time)
-            eta_str = format_time(eta_seconds)
+            result = self.processor.process_file(record, self.dest_dir)
+            self._record_result(i + 1, record, result, start_time)
+    
+    def _process_parallel(self, all_files, start_time):
+        """Process files through the dedup and copy pipeline stages.
+        
+        The dedup stage (skip rules, fingerprint or hash, duplicate lookup)
+        only reads the source and runs on dedup_workers threads; files that
+        need a copy move on to the copy stage (metadata, copy, catalog) on
+        max_workers threads. Each stage has its own queue of batch_size
+        files, scheduled so each source device has a bounded number of
+        files being read, the destination device a bounded number being
+        written, and devices are served in turn. Image exports are only
+        queued here and created in the export phase afterwards. Results are
+        tallied on this thread, so statistics and progress stay exact.
+        """
+        results = queue.Queue()
+        dest_dev = os.stat(self.dest_dir).st_dev
+        dedup_queue = DeviceQueue(lambda record: (record.dev, None), self.batch_size, self.device_read_limit)
+        copy_queue = DeviceQueue(lambda checked: (checked.record.dev, dest_dev), self.batch_size,
+                                 self.device_read_limit, self.device_write_limit)
+        dedup = Stage('dedup', lambda record: self._dedup_stage(record, results),
+                      self.dedup_workers, work_queue=dedup_queue)
+        copy = Stage('copy', lambda checked: self._copy_stage(checked, results),
+                     self.max_workers, work_queue=copy_queue)
+        self.pipeline = Pipeline([dedup, copy])
+        self.pipeline.start()
+        
+        files = iter(all_files)
+        submitted = 0
+        finished = 0
+        completed = 0
+        try:
+            while not self.stopped:
+                record = next(files, None)
+                if record is None:
+                    break
+                dedup.put(record)
+                submitted += 1
+                # Report whatever has finished meanwhile without waiting
+                while finished < submitted:
+                    try:
+                        record, result = results.get_nowait()
+                    except queue.Empty:
+                        break
+                    finished += 1
+                    if result is not None:
+                        completed += 1
+                        self._record_result(completed, record, result, start_time)
             
-            if result['status'] == 'processed':
-                if self.logger:
-                    self.logger.info(f"Processed: {file_path} -> {result.get('destination', 'unknown')}")
-                if self.progress_callback:
-                    self.progress_callback(i + 1, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
-            elif result['status'] == 'skipped':
-                if self.logger:
-                    self.logger.info(f"Skipped: {file_path} ({result.get('reason', 'unknown')})")
-                if self.progress_callback:
-                    self.progress_callback(i + 1, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
-            elif result['status'] == 'duplicate':
-                if self.logger:
-                    self.logger.warning(f"Duplicate: {file_path} (original: {result.get('original', 'unknown')})")
-                if self.progress_callback:
-                    self.progress_callback(i + 1, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
+            while finished < submitted:
+                record, result = results.get()
+                finished += 1
+                if result is not None:
+                    completed += 1
+                    self._record_result(completed, record, result, start_time)
+        finally:
+            self.pipeline.close()
+    
+    def _run_exports(self):
+        """Export phase: create the image exports queued in the catalog.
+        
+        Jobs are read in batches, the jobs of one image (one per export
+        profile) are combined into a task decoded once, and tasks are handed
+        to export_workers processes (or created inline with export_workers
+        0). A job is removed from the
+        queue once it has finished, so a stopped or interrupted run resumes
+        with the remaining jobs next time. Jobs whose content already has an
+        export with the current settings are skipped, and exports made with
+        previous settings are queued again first.
+        """
+        if not self.processor.image_organizer.export_enabled:
+            return
+        self._queue_stale_exports()
+        total = self.database.count_export_jobs()
+        self.export_progress = {'completed': 0, 'total': total}
+        if not total:
+            return
+        if self.logger:
+            self.logger.info(f"Creating {total} queued image exports...")
+        
+        results = queue.Queue()
+        # Jobs submitted but not recorded yet, by id
+        waiting = {}
+        if self.export_workers > 0:
+            self.export_pool = ExportPool(self.export_workers, self.export_queue_size,
+                                          lambda task, task_results: results.put((task, task_results)))
+        start_time = time.time()
+        finished = 0
+        after_id = 0
+        try:
+            while not self.stopped:
+                jobs = self.database.get_export_jobs(after_id, self.batch_size)
+                if not jobs:
+                    break
+                for image_jobs in self._group_export_jobs(jobs, len(jobs) == self.batch_size):
+                    self._wait_while_paused()
+                    if self.stopped:
+                        break
+                    after_id = image_jobs[-1]['id']
+                    missing = []
+                    for job in image_jobs:
+                        waiting[job['id']] = job
+                        cached = self._cached_export(job)
+                        if cached:
+                            results.put((export_task([job]), [{'export': cached, 'error': None, 'cached': True}]))
+                        else:
+                            missing.append(job)
+                    if missing:
+                        task = export_task(missing)
+                        if self.export_pool is not None:
+                            self.export_pool.submit(task)
+                        else:
+                            results.put((task, create_export(task)))
+                    # Record whatever has finished meanwhile without waiting
+                    finished = self._collect_exports(results, waiting, finished, start_time)
+        finally:
+            # Tasks already submitted still finish, even after a stop
+            if self.export_pool is not None:
+                self.export_pool.close()
+                self.export_pool = None
+        
+        finished = self._collect_exports(results, waiting, finished, start_time, block=True)
+        
+        if self.logger:
+            remaining = total - finished
+            if remaining:
+                self.logger.info(f"Created {finished} image exports, {remaining} left for the next run")
             else:
-                if self.logger:
-                    self.logger.error(f"Error processing {file_path}: {result.get('reason', 'unknown')}")
-                if self.progress_callback:
-                    self.progress_callback(i + 1, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
-            
-            # Update statistics
-            if result['status'] == 'processed':
-                self.stats['processed'] += 1
-            elif result['status'] == 'skipped':
-                self.stats['skipped'] += 1
-            elif result['status'] == 'duplicate':
-                self.stats['duplicates'] += 1
+                self.logger.info(f"Created {finished} image exports")
+    
+    def _group_export_jobs(self, jobs, more):
+        """Split a page of queued jobs into lists of consecutive jobs for the same image.
+        
+        When more pages follow, the last image is left for the next page, as
+        some of its jobs may be on it.
+        """
+        groups = []
+        for job in jobs:
+            if groups and groups[-1][-1]['image_path'] == job['image_path']:
+                groups[-1].append(job)
             else:
-                self.stats['errors'] += 1
-            
-            # Progress callback (already called above with file info)
+                groups.append([job])
+        if more and len(groups) > 1:
+            groups.pop()
+        return groups
+    
+    def _collect_exports(self, results, waiting, finished, start_time, block=False):
+        """Record finished export tasks, optionally waiting for all; returns the exports finished so far."""
+        while waiting:
+            try:
+                task, task_results = results.get(block=block)
+            except queue.Empty:
+                break
+            for output, result in zip(task['outputs'], task_results):
+                finished += 1
+                self._record_export(finished, waiting.pop(output['id']), result, start_time)
+        return finished
+    
+    def _queue_stale_exports(self):
+        """Queue exports again whose profile settings have changed since they were created."""
+        profiles = self.processor.image_organizer.export_profiles
+        stale = []
+        for order, profile in enumerate(profiles):
+            for image_path, export_path in self.database.get_stale_exports(
+                    profile['name'], profile['max_width'], profile['max_height'], profile['quality'], EXPORT_FORMAT):
+                stale.append((image_path, order, export_path))
+        if not stale:
+            return
+        if self.logger:
+            self.logger.info(f"Refreshing {len(stale)} exports made with previous export settings...")
+        # Jobs of the same image are queued together, so it is decoded once
+        jobs = []
+        for image_path, order, export_path in sorted(stale):
+            profile = profiles[order]
+            jobs.append({
+                'source': image_path,
+                'image_path': image_path,
+                'export_path': export_path,
+                # The export keeps the EXIF of the organized original
+                'exif': None,
+                'max_width': profile['max_width'],
+                'max_height': profile['max_height'],
+                'quality': profile['quality'],
+                'heic': image_path.lower().endswith(('.heic', '.heif')),
+                'profile': profile['name']
+            })
+        self.database.add_export_jobs(jobs)
+    
+    def _cached_export(self, job):
+        """Return an existing export of the job's content with the job's settings, or None.
         
-        # Log final results
+        Also stores the content's catalog digest in the job, for indexing the
+        new export; a deferred catalog hash, e.g. of a large file that only
+        has a fingerprint, is computed first.
+        """
+        job['source_hash'] = self.processor.catalog_hash(job['image_path'])
+        if job['source_hash'] is None:
+            return None
+        export_path = self.database.get_indexed_export(*job['source_hash'], job['max_width'], job['max_height'],
+                                                       job['quality'], EXPORT_FORMAT)
+        if export_path and os.path.exists(export_path):
+            return export_path
+        return None
+    
+    def _record_export(self, count, job, result, start_time):
+        """Update statistics, log and report progress for one finished export."""
+        self.database.remove_export_job(job['id'])
+        self.export_progress['completed'] = count
+        if result.get('cached'):
+            self.stats['exports_cached'] += 1
+            action = 'CACHED'
+            if self.logger:
+                self.logger.info(f"Export up to date: {job['source']} -> {result['export']}")
+        elif result['export']:
+            self.stats['exports'] += 1
+            action = 'EXPORTED'
+            if job['source_hash']:
+                self.database.add_indexed_export(*job['source_hash'], job['max_width'], job['max_height'],
+                                                 job['quality'], EXPORT_FORMAT, result['export'], job['image_path'],
+                                                 job['profile'])
+            if self.logger:
+                self.logger.info(f"Exported: {job['source']} -> {result['export']}")
+        else:
+            self.stats['export_errors'] += 1
+            self.database.remove_indexed_export(job['export_path'])
+            action = 'EXPORT ERROR'
+            if self.logger:
+                self.logger.error(f"Export failed for {job['source']}: {result['error']}")
+        
+        if self.progress_callback:
+            total = self.export_progress['total']
+            elapsed_time = time.time() - start_time
+            eta_seconds = elapsed_time / count * (total - count)
+            self.progress_callback(count, total, self.stats, format_time(elapsed_time),
+                                   format_time(eta_seconds), f"{action.ljust(10)} {job['source']}")
+    
+    def _dedup_stage(self, record, results):
+        """Dedup stage handler; files still queued at a stop are returned unprocessed.
+        
+        Every file gets a result, or moves on to the copy stage, even when
+        the check raises, so _process_parallel never waits for a lost file.
+        """
+        self._wait_while_paused()
+        if self.stopped:
+            results.put((record, None))
+            return
+        try:
+            checked = self.processor.check_file(record)
+        except Exception as e:
+            results.put((record, self._stage_error(record, e)))
+            return
+        if checked.result is not None:
+            results.put((record, checked.result))
+        else:
+            self.pipeline['copy'].put(checked)
+    
+    def _copy_stage(self, checked, results):
+        """Copy stage handler; files still queued at a stop are released unprocessed."""
+        self._wait_while_paused()
+        if self.stopped:
+            self.processor.release(checked)
+            results.put((checked.record, None))
+            return
+        try:
+            result = self.processor.copy_file(checked, self.dest_dir)
+        except Exception as e:
+            # Other files of this size or content wait for the reservations
+            self.processor.release(checked)
+            result = self._stage_error(checked.record, e)
+        results.put((checked.record, result))
+    
+    def _stage_error(self, record, error):
+        """Log an exception raised by a stage handler and return the file's error result."""
         if self.logger:
-            if self.stopped:
-                self.logger.warning("Organization stopped by user")
-            else:
-                self.logger.info("Organization completed successfully")
-            
-            self.logger.info(f"Final statistics: {self.stats}")
+            self.logger.error(f"Processing error: {record.path} - {error}")
+        return {'status': 'error', 'reason': str(error)}
+    
+    def _record_result(self, count, record, result, start_time):
+        """Update statistics, log and report progress for one finished file."""
+        file_path = record.path
         
-        return not self.stopped
+        # Calculate timing info
+        elapsed_time = time.time() - start_time
+        if count > 1:
+            avg_time_per_file = elapsed_time / count
+            remaining_files = max(self.stats['total'] - count, 0)
+            eta_seconds = avg_time_per_file * remaining_files
+        else:
+            eta_seconds = 0
+        
+        # Log file processing with aligned format
+        action = result['status'].upper().ljust(10)
+        file_path_str = str(file_path)
+        
+        # Format timing for human readability
+        elapsed_str = format_time(elapsed_time)
+        eta_str = format_time(eta_seconds)
+        
+        if result['status'] == 'processed':
+            if self.logger:
+                self.logger.info(f"Processed: {file_path} -> {result.get('destination', 'unknown')}")
+            if self.progress_callback:
+                self.progress_callback(count, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
+        elif result['status'] == 'skipped':
+            if self.logger:
+                self.logger.info(f"Skipped: {file_path} ({result.get('reason', 'unknown')})")
+            if self.progress_callback:
+                self.progress_callback(count, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
+        elif result['status'] == 'duplicate':
+            if self.logger:
+                self.logger.warning(f"Duplicate: {file_path} (original: {result.get('original', 'unknown')})")
+            if self.progress_callback:
+                self.progress_callback(count, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
+        else:
+            if self.logger:
+                self.logger.error(f"Error processing {file_path}: {result.get('reason', 'unknown')}")
+            if self.progress_callback:
+                self.progress_callback(count, self.stats['total'], self.stats, elapsed_str, eta_str, f"{action} {file_path_str}")
+        
+        # Update statistics
+        if result['status'] == 'processed':
+            self.stats['processed'] += 1
+        elif result['status'] == 'skipped':
+            self.stats['skipped'] += 1
+        elif result['status'] == 'duplicate':
+            self.stats['duplicates'] += 1
+        else:
+            self.stats['errors'] += 1
+            self.failed_dirs.add(str(file_path.parent))
+    
+    def _hash_pending(self):
+        """Hash destination files whose catalog hash was deferred during the run."""
+        pending = len(self.database.get_pending())
+        if not pending:
+            return
+        if self.logger:
+            self.logger.info(f"Hashing {pending} files deferred by the size pre-filter...")
+        completed = self.processor.hash_pending(should_stop=lambda: self.stopped)
+        if self.logger:
+            self.logger.info(f"Completed {completed} deferred catalog entries")
+    
+    def _rehash_catalog(self):
+        """Re-hash catalog entries whose digest was made with another algorithm."""
+        stale = len(self.database.get_stale_hashes(self.processor.algorithm))
+        if not stale:
+            return
+        if self.logger:
+            self.logger.info(f"Re-hashing {stale} catalog entries with {self.processor.algorithm}...")
+        migrated = self.processor.rehash_stale(should_stop=lambda: self.stopped)
+        if self.logger:
+            self.logger.info(f"Migrated {migrated} catalog entries")
+    
+    def _stream_files(self):
+        """Yield files from a background walk through a bounded queue."""
+        self.stats['total'] = 0
+        file_queue = queue.Queue(maxsize=self.scan_queue_size)
+        self.scan_queue = file_queue
+        
+        producer = threading.Thread(target=self._produce_files, args=(file_queue,), daemon=True)
+        producer.start()
+        
+        while True:
+            try:
+                record = file_queue.get(timeout=0.1)
+            except queue.Empty:
+                # A stopped producer exits without queuing the end marker
+                if self.stopped:
+                    break
+                continue
+            if record is None:
+                break
+            yield record
+    
+    def _produce_files(self, file_queue):
+        """Feed scanned files into the queue until the walk ends or is stopped.
+        
+        The total is the number of files found so far until the walk
+        finishes, so progress and ETA fill in as it runs.
+        """
+        try:
+            for record in self._scan_files():
+                # Counted before queuing so the total never trails the processed count
+                self.stats['total'] += 1
+                if not self._put_while_running(file_queue, record):
+                    return
+            if self.logger:
+                self.logger.info(f"Found {self.stats['total']} files to process")
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Scan error: {e}")
+        # None marks the end of the scan
+        self._put_while_running(file_queue, None)
+    
+    def _put_while_running(self, file_queue, item):
+        """Block on a full queue without outliving a stop request."""
+        while not self.stopped:
+            try:
+                file_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
     
     def _scan_files(self):
-        """Recursively scan source directory for files."""
-        for root, dirs, files in os.walk(self.source_dir):
-            # Skip directories that should be ignored
-            dirs[:] = [d for d in dirs if not self.processor.skipper.should_skip_directory(Path(root) / d)]
-            
-            for file in files:
-                # Sanitize filename to remove null characters
-                clean_file = file.replace('\x00', '')
-                if clean_file != file:
-                    if self.logger:
-                        self.logger.warning(f"Sanitized filename with null characters: {repr(file)}")
-                
-                file_path = Path(root) / clean_file
-                if not self.processor.skipper.should_skip_file(file_path):
-                    yield file_path
+        """Recursively scan source directory, yielding a FileRecord per file."""
+        return self.scanner.scan(self.source_dir.absolute())
     
     def get_stats(self):
         """Get current processing statistics."""
-        return self.stats.copy()
\ No newline at end of file
+        return self.stats.copy()
+    
+    def get_export_progress(self):
+        """Get {'completed', 'total'} for the export phase of the current run."""
+        return self.export_progress.copy()
+    
+    def get_queue_depths(self):
+        """Get the number of files waiting in front of each stage."""
+        depths = {}
+        if self.scan_queue is not None:
+            depths['scan'] = self.scan_queue.qsize()
+        if self.pipeline is not None:
+            depths.update(self.pipeline.queue_depths())
+        if self.export_pool is not None:
+            depths['export'] = self.export_pool.depth()
+        return depths
\ No newline at end of file
@@ -529,7 +529,8 @@ class ZenSortGUI:
             self.root.after(0, lambda: self.log(
                 f"Total: {stats['total']} | Processed: {stats['processed']} | "
                 f"Skipped: {stats['skipped']} | Duplicates: {stats['duplicates']} | "
-                f"Errors: {stats['errors']}", 'info'
+                f"Errors: {stats['errors']} | Exports: {stats['exports']} "
+                f"({stats['export_errors']} failed)", 'info'
             ))
             self.root.after(0, lambda: self.log(
                 f"Log file saved in: {self.dest_var.get()}/logs/", 'info'
@@ -556,7 +557,7 @@ class ZenSortGUI:
             # Show file action if provided
             if file_action:
                 action = file_action.split(' ', 1)[0]
-                tag = 'success' if action == 'PROCESSED' else 'warning' if action in ['SKIPPED', 'DUPLICATE'] else 'error'
+                tag = 'success' if action in ['PROCESSED', 'EXPORTED'] else 'warning' if action in ['SKIPPED', 'DUPLICATE', 'CACHED'] else 'error'
                 self.root.after(0, lambda: self.log(file_action, tag))
     
     def log(self, message, tag='file'):
@@ -0,0 +1,161 @@
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+import logging
+
+logger = logging.getLogger('ZenSort')
+
+try:
+    from .image_metadata import ImageMetadata
+    from .ffmpeg_handler import FFmpegHandler
+except ImportError:
+    from image_metadata import ImageMetadata
+    from ffmpeg_handler import FFmpegHandler
+
+# Format of every export; part of the export index key
+EXPORT_FORMAT = 'jpeg'
+
+# Created on first use in each process
+_metadata_handler = None
+_ffmpeg_handler = None
+
+
+def export_task(jobs):
+    """Combine the export jobs of one image into a task decoded once.
+    
+    Every job describes one output (export_path, max_width, max_height,
+    quality); the image, EXIF and HEIC settings are taken from the first.
+    """
+    first = jobs[0]
+    outputs = [{'id': job.get('id'), 'export_path': job['export_path'], 'max_width': job['max_width'],
+                'max_height': job['max_height'], 'quality': job['quality']} for job in jobs]
+    return {
+        'image_path': first['image_path'],
+        'exif': first['exif'],
+        'heic': first['heic'],
+        'source': first['source'],
+        # Largest first, so each output is downsampled from the previous one
+        'outputs': sorted(outputs, key=lambda output: output['max_width'] * output['max_height'], reverse=True)
+    }
+
+
+def _draft(img, outputs):
+    """Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding.
+    
+    The scale is the smallest reduction that still leaves the image at
+    least as large as every output needs, so the LANCZOS resize that
+    follows keeps its quality. Other formats ignore draft(); thumbnail()
+    reduces them before resampling instead.
+    """
+    width, height = 0, 0
+    for output in outputs:
+        scale = min(1, output['max_width'] / img.width, output['max_height'] / img.height)
+        width = max(width, math.ceil(img.width * scale))
+        height = max(height, math.ceil(img.height * scale))
+    if width < img.width and height < img.height:
+        img.draft(None, (width, height))
+
+
+def create_export(task):
+    """Create every output of an export task from a single decode.
+    
+    Tasks only hold paths and plain settings so they can be sent to worker
+    processes:
+    - image_path: file to decode (usually the fresh destination copy)
+    - exif: raw EXIF bytes to embed, or None to keep the image's own EXIF
+    - heic: decode a JPEG converted by FFmpeg, as PIL cannot read HEIC
+    - outputs: [{export_path, max_width, max_height, quality}], largest first
+    
+    Returns [{'export': path or None, 'error': message or None}], one per output.
+    """
+    global _metadata_handler, _ffmpeg_handler
+    outputs = task['outputs']
+    results = []
+    try:
+        image_path = task['image_path']
+        converted = None
+        if task['heic']:
+            # FFmpeg writes the largest output, which is then decoded for the chain
+            if _ffmpeg_handler is None:
+                _ffmpeg_handler = FFmpegHandler()
+            converted = outputs[0]['export_path']
+            if not _ffmpeg_handler.convert_heic_to_jpeg(image_path, converted, outputs[0]['quality']):
+                return [{'export': None, 'error': f"could not convert {image_path}"} for _ in outputs]
+            image_path = converted
+        if _metadata_handler is None:
+            _metadata_handler = ImageMetadata()
+        with Image.open(image_path) as img:
+            _draft(img, outputs)
+            img.load()
+            exif = task['exif'] if task['exif'] is not None else img.info.get('exif')
+            for output in outputs:
+                # Resize if needed (preserve aspect ratio); thumbnail() works in place,
+                # so the next output starts from this one
+                if img.width > output['max_width'] or img.height > output['max_height']:
+                    img.thumbnail((output['max_width'], output['max_height']), Image.Resampling.LANCZOS)
+                elif output['export_path'] == converted:
+                    # The FFmpeg output already fits
+                    results.append({'export': converted, 'error': None})
+                    continue
+                if _metadata_handler.save_with_exif(img, output['export_path'], exif, output['quality']):
+                    results.append({'export': output['export_path'], 'error': None})
+                else:
+                    results.append({'export': None, 'error': f"could not write {output['export_path']}"})
+        return results
+    except Exception as e:
+        return results + [{'export': None, 'error': str(e)}] * (len(task['outputs']) - len(results))
+
+
+class ExportPool:
+    """Runs export tasks in worker processes, so resizing and encoding don't hold the GIL.
+
+    submit() waits while max_pending tasks are in flight. on_done(task, results)
+    is called from a background thread as each task completes.
+    """
+
+    def __init__(self, workers, max_pending=50, on_done=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.on_done = on_done
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def submit(self, task):
+        """Queue a task for a worker process."""
+        self.slots.acquire()
+        with self.lock:
+            self.pending += 1
+        try:
+            future = self.executor.submit(create_export, task)
+        except Exception as e:
+            # E.g. the pool broke after a worker crashed; export in this process instead
+            logger.warning(f"Export pool unavailable ({e}), exporting in process")
+            self._finish(task, create_export(task))
+            return
+        future.add_done_callback(lambda f: self._finished(task, f))
+
+    def depth(self):
+        """Return the number of tasks submitted but not finished."""
+        with self.lock:
+            return self.pending
+
+    def close(self):
+        """Wait for all submitted tasks and stop the worker processes."""
+        self.executor.shutdown(wait=True)
+
+    def _finished(self, task, future):
+        """Collect a finished task's results."""
+        try:
+            results = future.result()
+        except Exception as e:
+            results = [{'export': None, 'error': str(e)} for _ in task['outputs']]
+        self._finish(task, results)
+
+    def _finish(self, task, results):
+        """Release the task's slot and report its results."""
+        with self.lock:
+            self.pending -= 1
+        self.slots.release()
+        if self.on_done:
+            self.on_done(task, results)
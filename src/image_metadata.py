@@ -1,5 +1,6 @@
 from PIL import Image
 from datetime import datetime
+from contextlib import nullcontext
 import logging
 
 # HEIC files are handled without external libraries
@@ -8,6 +9,11 @@ logger = logging.getLogger('ZenSort')
 # ExifRead fallback for when PIL fails
 import exifread
 
+try:
+    from .exif_reader import read_exif
+except ImportError:
+    from exif_reader import read_exif
+
 
 class ImageMetadata:
     def __init__(self, config=None):
@@ -17,8 +23,73 @@ class ImageMetadata:
             'pixlr', 'windows photo', 'picasa'
         ]) if config else ['photoshop', 'adobe', 'lightroom', 'gimp', 'paint.net', 'canva', 'pixlr', 'windows photo', 'picasa']
     
-    def process_image(self, image_path):
-        """Process image and return metadata with loaded image."""
+    def read_metadata(self, image_path, source=None):
+        """Return routing metadata without decoding the image.
+        
+        JPEG, TIFF and HEIC EXIF is parsed from the file header; other files,
+        or EXIF that can't be located there, go through process_image.
+        source is an open binary file to read instead of image_path.
+        """
+        tags = read_exif(image_path, source=source)
+        if tags is None:
+            metadata, img, _ = self.process_image(image_path, source)
+            if img:
+                img.close()
+            return metadata
+        
+        metadata = {
+            'datetime': None,
+            'make': None,
+            'model': None,
+            'software': '',
+            'is_edited': False,
+            'year': '0000'
+        }
+        
+        # DateTimeOriginal, then DateTimeDigitized, then DateTime
+        for tag in ('DateTimeOriginal', 'DateTimeDigitized', 'DateTime'):
+            dt = self._parse_datetime(tags.get(tag))
+            if dt:
+                metadata['datetime'] = dt
+                metadata['year'] = dt.strftime('%Y')
+                break
+        
+        if tags.get('Make'):
+            metadata['make'] = tags['Make']
+        if tags.get('Model'):
+            metadata['model'] = tags['Model']
+        if tags.get('Software'):
+            software = tags['Software'].lower()
+            metadata['software'] = software
+            metadata['is_edited'] = any(editor in software for editor in self.editing_software)
+        
+        return metadata
+    
+    def export_exif(self, image_path, metadata, source=None):
+        """Return the EXIF to embed in an export, with normalized datetime tags.
+        
+        Returns None when the image can't be opened, and b'' when it has no EXIF.
+        """
+        try:
+            with Image.open(self._rewind(source) or image_path) as img:
+                exif = img.getexif()
+                if not exif:
+                    return b''
+                if metadata.get('datetime'):
+                    standard_dt = metadata['datetime'].strftime('%Y:%m:%d %H:%M:%S')
+                    exif[306] = standard_dt  # DateTime
+                    exif[36867] = standard_dt  # DateTimeOriginal
+                    exif[36868] = standard_dt  # DateTimeDigitized
+                return exif.tobytes()
+        except Exception as e:
+            logger.error(f"Error reading EXIF of {image_path}: {e}")
+            return None
+    
+    def process_image(self, image_path, source=None):
+        """Process image and return metadata with loaded image.
+        
+        source is an open binary file to read instead of image_path.
+        """
         try:
             # Initialize metadata
             metadata = {
@@ -32,12 +103,12 @@ class ImageMetadata:
             
             # HEIC files cannot be opened by PIL without external libraries
             if str(image_path).lower().endswith(('.heic', '.heif')):
-                heic_metadata = self._extract_metadata_with_exifread(image_path)
+                heic_metadata = self._extract_metadata_with_exifread(image_path, source)
                 if heic_metadata:
                     metadata.update(heic_metadata)
                 return metadata, None, None
             
-            img = Image.open(image_path)
+            img = Image.open(self._rewind(source) or image_path)
             exif = img.getexif() or {}
             
             if exif and len(exif) > 0:
@@ -68,7 +139,7 @@ class ImageMetadata:
             
             # ExifRead fallback if PIL failed to extract datetime
             if not metadata['datetime']:
-                self._set_datetime_from_exifread(image_path, metadata)
+                self._set_datetime_from_exifread(image_path, metadata, source)
             
             return metadata, img, exif
             
@@ -76,6 +147,18 @@ class ImageMetadata:
             logger.error(f"Error processing image {image_path}: {e}")
             return {}, None, None
     
+    def _rewind(self, source):
+        """Return a shared source file positioned at its start, or None."""
+        if source is not None:
+            source.seek(0)
+        return source
+    
+    def _open(self, image_path, source):
+        """Open image_path for reading, or reuse the shared source without closing it."""
+        if source is not None:
+            return nullcontext(self._rewind(source))
+        return open(image_path, 'rb')
+    
     def _parse_datetime(self, dt_str):
         """Parse datetime string with multiple format support."""
         if not dt_str or dt_str.strip() == '':
@@ -134,19 +217,19 @@ class ImageMetadata:
             logger.error(f"Error saving image {output_path}: {e}")
             return False
     
-    def _set_datetime_from_exifread(self, image_path, metadata):
+    def _set_datetime_from_exifread(self, image_path, metadata, source=None):
         """Extract and set datetime using ExifRead."""
-        dt_str = self._extract_datetime_with_exifread(image_path)
+        dt_str = self._extract_datetime_with_exifread(image_path, source)
         if dt_str:
             dt = self._parse_datetime(dt_str)
             if dt:
                 metadata['datetime'] = dt
                 metadata['year'] = dt.strftime('%Y')
     
-    def _extract_datetime_with_exifread(self, image_path):
+    def _extract_datetime_with_exifread(self, image_path, source=None):
         """Extract datetime using ExifRead as fallback."""
         try:
-            with open(image_path, 'rb') as f:
+            with self._open(image_path, source) as f:
                 tags = exifread.process_file(f, stop_tag='EXIF DateTimeOriginal')
                 
                 # Try DateTimeOriginal, DateTimeDigitized, DateTime
@@ -159,10 +242,10 @@ class ImageMetadata:
         
         return None
     
-    def _extract_metadata_with_exifread(self, image_path):
+    def _extract_metadata_with_exifread(self, image_path, source=None):
         """Extract full metadata using ExifRead for HEIC files."""
         try:
-            with open(image_path, 'rb') as f:
+            with self._open(image_path, source) as f:
                 tags = exifread.process_file(f)
                 
                 metadata = {
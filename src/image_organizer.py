@@ -1,26 +1,22 @@
 import re
 from pathlib import Path
-from PIL import Image
 import logging
 
 logger = logging.getLogger('ZenSort')
 
-try:
-    from .ffmpeg_handler import FFmpegHandler
-except ImportError:
-    from ffmpeg_handler import FFmpegHandler
 try:
     from .image_metadata import ImageMetadata
     from .file_copy import FileCopy
+    from .image_export import create_export, export_task
 except ImportError:
     from image_metadata import ImageMetadata
     from file_copy import FileCopy
+    from image_export import create_export, export_task
 
 
 class ImageOrganizer:
     def __init__(self, config):
         self.metadata_handler = ImageMetadata(config)
-        self.ffmpeg_handler = FFmpegHandler()
         
         # Cache directory names
         directories = config.get('directories', {})
@@ -47,44 +43,88 @@ class ImageOrganizer:
         self.max_height = image_config.get('max_height', 2160)
         self.quality = image_config.get('quality', 85)
         
+        # Every profile is one export size; all are made from a single decode,
+        # largest first. Without profiles there is a single export
+        profiles = image_config.get('profiles') or [{'name': 'export'}]
+        self.export_profiles = sorted(
+            [{
+                'name': profile.get('name', 'export'),
+                'directory': profile.get('directory', ''),
+                'max_width': profile.get('max_width', self.max_width),
+                'max_height': profile.get('max_height', self.max_height),
+                'quality': profile.get('quality', self.quality)
+            } for profile in profiles],
+            key=lambda profile: profile['max_width'] * profile['max_height'], reverse=True
+        )
+        self._check_export_directories()
+        
+        # When set, the export jobs of each image (one per profile) are handed
+        # to this callable instead of being created inline, e.g. to queue
+        # them for a later export phase
+        self.export_sink = None
+        
         # Cache compiled screenshot patterns
         screenshot_patterns = config.get('screenshot_patterns', ['screenshot', 'screen.*shot', 'capture'])
         self.screenshot_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in screenshot_patterns]
     
-    def organize_image(self, file_path, base_dir):
+    def _check_export_directories(self):
+        """Reject profiles that would write their exports to the same files."""
+        seen = {}
+        for profile in self.export_profiles:
+            # Compared as the filesystem may see them: without separators at
+            # the ends and ignoring case
+            key = str(profile['directory']).strip('/\\').replace('\\', '/').casefold()
+            if key in seen:
+                location = '/'.join(part for part in (self.exports_dir, profile['directory']) if part)
+                raise ValueError(
+                    f"Export profiles '{seen[key]}' and '{profile['name']}' both write to {location}; "
+                    f"give each profile its own directory"
+                )
+            seen[key] = profile['name']
+    
+    def organize_image(self, file_path, base_dir, record=None):
         """Organize image into appropriate directory structure."""
         path = Path(file_path)
         filename = path.name
         
         # Check if hidden
         if filename.startswith('.'):
-            return self._move_to_hidden(file_path, base_dir)
+            return self._move_to_hidden(file_path, base_dir, record)
         
         # Check if screenshot
         if self._is_screenshot(filename):
-            return self._move_to_screenshots(file_path, base_dir)
+            return self._move_to_screenshots(file_path, base_dir, record)
         
         # Check if social media image
         if self._is_social_media_image(filename):
-            return self._move_to_social_media(file_path, base_dir)
+            return self._move_to_social_media(file_path, base_dir, record)
         
-        # Process image and get metadata
-        metadata, img, exif = self.metadata_handler.process_image(file_path)
+        # Routing only needs header metadata; the image is opened for exports only
+        metadata = self._read_metadata(file_path, record)
         
-        try:
-            # Check if edited photo
-            if metadata.get('is_edited'):
-                return self._move_to_edited(file_path, base_dir)
-            
-            # Route based on EXIF data
-            if metadata.get('datetime') and (metadata.get('make') or metadata.get('model')):
-                return self._move_to_originals(file_path, base_dir, metadata, img, exif)
-            else:
-                return self._move_to_collections(file_path, base_dir, img, exif)
+        # Check if edited photo
+        if metadata.get('is_edited'):
+            return self._move_to_edited(file_path, base_dir, record)
         
-        finally:
-            if img:
-                img.close()
+        # Route based on EXIF data
+        if metadata.get('datetime') and (metadata.get('make') or metadata.get('model')):
+            return self._move_to_originals(file_path, base_dir, metadata, record)
+        else:
+            return self._move_to_collections(file_path, base_dir, metadata, record)
+    
+    def _read_metadata(self, file_path, record=None):
+        """Read routing metadata, from the record's shared header when there is one."""
+        if record is None:
+            return self.metadata_handler.read_metadata(file_path)
+        with record.open() as source:
+            return self.metadata_handler.read_metadata(file_path, source)
+    
+    def _export_exif(self, file_path, metadata, record=None):
+        """Read the export EXIF, from the record's shared header when there is one."""
+        if record is None:
+            return self.metadata_handler.export_exif(file_path, metadata)
+        with record.open() as source:
+            return self.metadata_handler.export_exif(file_path, metadata, source)
     
     def _is_screenshot(self, filename):
         """Check if image is a screenshot."""
@@ -98,7 +138,7 @@ class ImageOrganizer:
                 return True
         return False
     
-    def _move_to_originals(self, file_path, base_dir, metadata, img=None, exif=None):
+    def _move_to_originals(self, file_path, base_dir, metadata, record=None):
         """Move to Originals with camera/year structure."""
         make = metadata.get('make')
         model = metadata.get('model')
@@ -124,143 +164,119 @@ class ImageOrganizer:
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
         
-        result = FileCopy.copy_with_conflict_resolution(file_path, dest_path)
+        result = FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
         
         # Create export for originals only
         if result and self.export_enabled:
-            if img and exif is not None:
-                self._create_export(file_path, base_dir, metadata, img, exif)
-            elif str(file_path).lower().endswith(('.heic', '.heif')):
-                self._create_heic_export(file_path, base_dir, metadata)
+            if str(file_path).lower().endswith(('.heic', '.heif')):
+                self._export(file_path, result, base_dir, metadata, heic=True)
+            else:
+                exif = self._export_exif(file_path, metadata, record)
+                if exif is not None:
+                    self._export(file_path, result, base_dir, metadata, exif)
         
         return result
     
-    def _move_to_collections(self, file_path, base_dir, img=None, exif=None):
+    def _move_to_collections(self, file_path, base_dir, metadata=None, record=None):
         """Move to Collections directory."""
         dest_dir = Path(base_dir) / self.images_dir / self.collections_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
         
-        result = FileCopy.copy_with_conflict_resolution(file_path, dest_path)
+        result = FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
         
         # Create export for collections only if metadata is available
         if result and self.export_enabled:
-            if img and exif is not None:
-                metadata = {'year': None, 'make': None, 'model': None, 'datetime': None}
-                self._create_export(file_path, base_dir, metadata, img, exif)
-            elif str(file_path).lower().endswith(('.heic', '.heif')):
-                self._create_heic_export(file_path, base_dir, {'year': 'NoDate', 'make': None, 'model': None, 'datetime': None})
+            undated = {'year': 'NoDate', 'make': None, 'model': None, 'datetime': None}
+            if str(file_path).lower().endswith(('.heic', '.heif')):
+                self._export(file_path, result, base_dir, undated, heic=True)
+            else:
+                exif = self._export_exif(file_path, metadata or {}, record)
+                if exif is not None:
+                    self._export(file_path, result, base_dir, undated, exif)
         
         return result
     
-    def _move_to_screenshots(self, file_path, base_dir):
+    def _move_to_screenshots(self, file_path, base_dir, record=None):
         """Move to Screenshots directory."""
         dest_dir = Path(base_dir) / self.images_dir / self.screenshots_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
-        return FileCopy.copy_with_conflict_resolution(file_path, dest_path)
+        return FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
     
-    def _move_to_edited(self, file_path, base_dir):
+    def _move_to_edited(self, file_path, base_dir, record=None):
         """Move to Edited directory."""
         dest_dir = Path(base_dir) / self.images_dir / self.edited_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
-        return FileCopy.copy_with_conflict_resolution(file_path, dest_path)
+        return FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
     
-    def _move_to_hidden(self, file_path, base_dir):
+    def _move_to_hidden(self, file_path, base_dir, record=None):
         """Move to Hidden directory."""
         dest_dir = Path(base_dir) / self.images_dir / self.hidden_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
-        return FileCopy.copy_with_conflict_resolution(file_path, dest_path)
+        return FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
     
-    def _move_to_social_media(self, file_path, base_dir):
+    def _move_to_social_media(self, file_path, base_dir, record=None):
         """Move to Social Media directory."""
         dest_dir = Path(base_dir) / self.images_dir / self.social_media_dir
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest_path = dest_dir / Path(file_path).name
-        return FileCopy.copy_with_conflict_resolution(file_path, dest_path)
+        return FileCopy.copy_with_conflict_resolution(file_path, dest_path, record)
     
-    def _create_export(self, file_path, base_dir, metadata, img, exif):
-        """Create resized export with specific naming."""
+    def _export(self, file_path, dest_path, base_dir, metadata, exif=None, heic=False):
+        """Create the exports of every profile now, or hand them to the export sink."""
         try:
-            # Generate export filename
-            dt = metadata.get('datetime')
-            make = metadata.get('make')
-            model = metadata.get('model')
-            original_name = Path(file_path).stem
-            
-            # Build filename parts
-            filename_parts = []
-            
-            if dt:
-                year = dt.strftime('%Y')
-                date_time = dt.strftime('%Y-%m-%d - %H-%M-%S')
-                filename_parts.append(date_time)
-            else:
-                year = 'NoDate'
-            
-            if make and model:
-                filename_parts.append(f'{make} - {model}')
-            
-            filename_parts.append(original_name)
-            
-            export_filename = ' -- '.join(filename_parts) + '.jpg'
-            export_dir = Path(base_dir) / self.images_dir / self.exports_dir / year
-            export_dir.mkdir(parents=True, exist_ok=True)
-            export_path = export_dir / export_filename
-            
-            # Create export image
-            export_img = img.copy()
-            
-            # Resize if needed (preserve aspect ratio)
-            if export_img.width > self.max_width or export_img.height > self.max_height:
-                export_img.thumbnail((self.max_width, self.max_height), Image.Resampling.LANCZOS)
-            
-            # Save with EXIF preservation
-            success = self.metadata_handler.save_with_exif(export_img, export_path, exif, self.quality)
-            export_img.close()
-            
-            return str(export_path) if success else None
-            
+            jobs = [{
+                'source': str(file_path),
+                # Decode the fresh copy, which is likely still cached
+                'image_path': str(dest_path),
+                'export_path': str(self._export_path(file_path, base_dir, metadata, profile)),
+                'exif': exif or None,
+                'max_width': profile['max_width'],
+                'max_height': profile['max_height'],
+                'quality': profile['quality'],
+                'heic': heic,
+                'profile': profile['name']
+            } for profile in self.export_profiles]
         except Exception as e:
             logger.error(f"Error creating export for {file_path}: {e}")
             return None
+        
+        if self.export_sink is not None:
+            self.export_sink(jobs)
+            return None
+        
+        results = create_export(export_task(jobs))
+        for result in results:
+            if result['error']:
+                logger.error(f"Error creating export for {file_path}: {result['error']}")
+        return results[0]['export']
     
-    def _create_heic_export(self, file_path, base_dir, metadata):
-        """Create JPEG export from HEIC file."""
-        try:
-            # Generate export filename
-            dt = metadata.get('datetime')
-            make = metadata.get('make')
-            model = metadata.get('model')
-            original_name = Path(file_path).stem
-            
-            # Build filename parts
-            filename_parts = []
-            
-            if dt:
-                year = dt.strftime('%Y')
-                date_time = dt.strftime('%Y-%m-%d - %H-%M-%S')
-                filename_parts.append(date_time)
-            else:
-                year = 'NoDate'
-            
-            if make and model:
-                filename_parts.append(f'{make} - {model}')
-            
-            filename_parts.append(original_name)
-            
-            export_filename = ' -- '.join(filename_parts) + '.jpg'
-            export_dir = Path(base_dir) / self.images_dir / self.exports_dir / year
-            export_dir.mkdir(parents=True, exist_ok=True)
-            export_path = export_dir / export_filename
-            
-            # Convert HEIC to JPEG using FFmpeg
-            success = self.ffmpeg_handler.convert_heic_to_jpeg(file_path, export_path, self.quality)
-            
-            return str(export_path) if success else None
-            
-        except Exception as e:
-            logger.error(f"Error creating HEIC export for {file_path}: {e}")
-            return None
\ No newline at end of file
+    def _export_path(self, file_path, base_dir, metadata, profile):
+        """Build a profile's export path from date, camera and original name, creating its directory."""
+        dt = metadata.get('datetime')
+        make = metadata.get('make')
+        model = metadata.get('model')
+        original_name = Path(file_path).stem
+        
+        # Build filename parts
+        filename_parts = []
+        
+        if dt:
+            year = dt.strftime('%Y')
+            date_time = dt.strftime('%Y-%m-%d - %H-%M-%S')
+            filename_parts.append(date_time)
+        else:
+            year = 'NoDate'
+        
+        if make and model:
+            filename_parts.append(f'{make} - {model}')
+        
+        filename_parts.append(original_name)
+        
+        export_filename = ' -- '.join(filename_parts) + '.jpg'
+        export_dir = Path(base_dir) / self.images_dir / self.exports_dir / profile['directory'] / year
+        export_dir.mkdir(parents=True, exist_ok=True)
+        return export_dir / export_filename
@@ -0,0 +1,25 @@
+import threading
+
+
+class LockedCatalog:
+    """Wraps a FileHashDB so worker threads share one connection safely.
+
+    Every catalog call runs under a single lock, so all writes go through
+    one connection one at a time and reads always see them.
+    """
+
+    def __init__(self, database):
+        self._database = database
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._database, name)
+        if not callable(attr):
+            return attr
+
+        def locked_call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        locked_call.__name__ = name
+        return locked_call
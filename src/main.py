@@ -5,6 +5,7 @@ Launches GUI if no arguments, CLI if arguments provided
 """
 
 import sys
+import multiprocessing
 
 def main():
     """Main entry point - decide between CLI and GUI based on arguments."""
@@ -24,4 +25,6 @@ def main():
         gui_main()
 
 if __name__ == '__main__':
+    # Image exports run in worker processes; needed for frozen Windows builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import threading
 import time
 import logging
 
@@ -31,6 +32,7 @@ class MusicMetadataEnhancer:
             self.use_acoustid = self.config.get('use_acoustid')
             self.acoustid_api_key = self.config.get('acoustid_api_key', '')
             self.last_request_time = 0
+            self.rate_lock = threading.Lock()
     
     def enhance_metadata(self, file_path):
         """Enhance music metadata using MusicBrainz."""
@@ -148,9 +150,10 @@ class MusicMetadataEnhancer:
             return False
     
     def _rate_limit(self):
-        """Implement rate limiting for API requests."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit:
-            time.sleep(self.rate_limit - time_since_last)
-        self.last_request_time = time.time()
\ No newline at end of file
+        """Implement rate limiting for API requests, shared by all worker threads."""
+        with self.rate_lock:
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            if time_since_last < self.rate_limit:
+                time.sleep(self.rate_limit - time_since_last)
+            self.last_request_time = time.time()
\ No newline at end of file
@@ -0,0 +1,171 @@
+import queue
+import threading
+from collections import OrderedDict, defaultdict, deque
+import logging
+
+logger = logging.getLogger('ZenSort')
+
+# Tells a stage worker to exit once everything queued before it is handled
+_CLOSE = object()
+
+
+class Stage:
+    """A named pool of worker threads consuming a bounded input queue.
+
+    put() blocks while the queue is full, so a slow stage holds back the
+    stage feeding it instead of letting work pile up in memory.
+    """
+
+    def __init__(self, name, handler, workers=1, queue_size=0, work_queue=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers or 1))
+        # Any queue with put/get/task_done/qsize, e.g. a DeviceQueue
+        self.queue = work_queue if work_queue is not None else queue.Queue(maxsize=queue_size)
+        self.threads = []
+
+    def start(self):
+        """Start the worker threads."""
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"zensort-{self.name}-{n}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def put(self, item):
+        """Queue an item, waiting while the queue is full."""
+        self.queue.put(item)
+
+    def depth(self):
+        """Return the number of items waiting for a worker."""
+        return self.queue.qsize()
+
+    def close(self):
+        """Let the workers finish queued items, then wait for them to exit."""
+        for _ in self.threads:
+            self.queue.put(_CLOSE)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def _run(self):
+        """Worker loop: handle items until the close marker arrives."""
+        while True:
+            item = self.queue.get()
+            if item is _CLOSE:
+                break
+            try:
+                self.handler(item)
+            except Exception as e:
+                logger.error(f"Error in {self.name} stage: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class DeviceQueue:
+    """Bounded work queue that schedules items by the devices they touch.
+
+    devices(item) returns (source_device, destination_device). Items are
+    grouped by source device and handed out round-robin across groups;
+    an item is only handed out while its source device has fewer than
+    read_limit and its destination device fewer than write_limit items in
+    flight. A destination device of None means the item writes nothing.
+    A slow drive therefore only occupies its own slots, and the workers
+    keep serving the other devices.
+    """
+
+    def __init__(self, devices, maxsize=0, read_limit=4, write_limit=8):
+        self.devices = devices
+        self.maxsize = maxsize
+        self.read_limit = max(1, int(read_limit or 1))
+        self.write_limit = max(1, int(write_limit or 1))
+        self.groups = OrderedDict()
+        self.reading = defaultdict(int)
+        self.writing = defaultdict(int)
+        self.size = 0
+        self.close_requests = 0
+        self.cond = threading.Condition()
+        # Devices of the item each worker thread is currently handling
+        self.local = threading.local()
+
+    def put(self, item):
+        """Queue an item, waiting while the queue is full."""
+        with self.cond:
+            if item is _CLOSE:
+                self.close_requests += 1
+            else:
+                while self.maxsize and self.size >= self.maxsize:
+                    self.cond.wait()
+                source, _ = self.devices(item)
+                self.groups.setdefault(source, deque()).append(item)
+                self.size += 1
+            self.cond.notify_all()
+
+    def get(self):
+        """Return the next item whose devices have a free slot, waiting until one does."""
+        with self.cond:
+            while True:
+                for source in list(self.groups):
+                    group = self.groups[source]
+                    _, dest = self.devices(group[0])
+                    if self.reading[source] < self.read_limit and (dest is None or self.writing[dest] < self.write_limit):
+                        item = group.popleft()
+                        # Rotate so the next get() starts with another device
+                        self.groups.move_to_end(source)
+                        if not group:
+                            del self.groups[source]
+                        self.size -= 1
+                        self.reading[source] += 1
+                        self.writing[dest] += 1
+                        self.local.held = (source, dest)
+                        self.cond.notify_all()
+                        return item
+                # Close markers are only handed out once no work is left
+                if not self.size and self.close_requests:
+                    self.close_requests -= 1
+                    self.local.held = None
+                    return _CLOSE
+                self.cond.wait()
+
+    def task_done(self):
+        """Release the device slots of the item this thread just handled."""
+        held = getattr(self.local, 'held', None)
+        if held is None:
+            return
+        source, dest = held
+        with self.cond:
+            self.reading[source] -= 1
+            self.writing[dest] -= 1
+            self.local.held = None
+            self.cond.notify_all()
+
+    def qsize(self):
+        """Return the number of items waiting."""
+        with self.cond:
+            return self.size
+
+
+class Pipeline:
+    """Stages connected front to back; handlers pass work on with put()."""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def __getitem__(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def start(self):
+        """Start every stage."""
+        for stage in self.stages:
+            stage.start()
+
+    def close(self):
+        """Drain and stop the stages in order, so later stages receive all upstream work."""
+        for stage in self.stages:
+            stage.close()
+
+    def queue_depths(self):
+        """Return {stage name: items waiting} for every stage."""
+        return {stage.name: stage.depth() for stage in self.stages}
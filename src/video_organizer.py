@@ -37,83 +37,90 @@ class VideoOrganizer:
         ])
         self.motion_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in motion_patterns]
     
-    def organize_video(self, file_path, base_dir):
+    def organize_video(self, file_path, base_dir, record=None):
         """Organize video into appropriate directory structure."""
         path = Path(file_path)
         filename = path.name
         
         # Get creation year
-        year = self._get_video_year(file_path)
+        year = self._get_video_year(file_path, record)
         
         # Check motion photo patterns first
         if self._is_motion_photo(filename):
-            return self._move_to_motion_photos(file_path, base_dir, year)
+            return self._move_to_motion_photos(file_path, base_dir, year, record)
         
         # Check video duration for short videos
-        duration = self._get_video_duration(file_path)
+        duration = self._get_video_duration(file_path, record)
         if duration and duration <= self.short_video_threshold:
-            return self._move_to_short_videos(file_path, base_dir, year)
+            return self._move_to_short_videos(file_path, base_dir, year, record)
         
         # Regular videos
-        return self._move_to_regular_videos(file_path, base_dir, year)
+        return self._move_to_regular_videos(file_path, base_dir, year, record)
     
     def _is_motion_photo(self, filename):
         """Check if video is a motion photo."""
         return any(pattern.search(filename) for pattern in self.motion_patterns)
     
-    def _get_video_year(self, file_path):
+    def _get_video_year(self, file_path, record=None):
         """Get video creation year from metadata or file stats."""
         try:
             # Try to get from file modification time as fallback
-            stat = os.stat(file_path)
-            return datetime.fromtimestamp(stat.st_mtime).strftime('%Y')
+            mtime = record.mtime if record else os.stat(file_path).st_mtime
+            return datetime.fromtimestamp(mtime).strftime('%Y')
         except Exception:
             return '0000'
     
-    def _get_video_duration(self, file_path):
+    def _get_video_duration(self, file_path, record=None):
         """Get video duration in seconds."""
         try:
             # Basic duration check using file size as approximation
             # In a real implementation, you'd use ffprobe or similar
-            stat = os.stat(file_path)
+            size = record.size if record else os.stat(file_path).st_size
             # Rough estimate: assume 1MB per minute for standard video
-            estimated_duration = stat.st_size / (1024 * 1024) * 60
+            estimated_duration = size / (1024 * 1024) * 60
             return estimated_duration
         except Exception:
             return None
     
-    def _move_to_motion_photos(self, file_path, base_dir, year):
+    def _move_to_motion_photos(self, file_path, base_dir, year, record=None):
         """Move to Motion Photos directory."""
         dest_dir = Path(base_dir) / self.videos_dir / self.motion_photos_dir / year
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         # Extract metadata and generate filename
-        metadata = self.ffmpeg_handler.extract_video_metadata(file_path)
+        metadata = self._extract_metadata(file_path, record)
         new_filename = self._generate_video_filename(file_path, metadata)
         dest_path = dest_dir / new_filename
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
-    def _move_to_short_videos(self, file_path, base_dir, year):
+    def _move_to_short_videos(self, file_path, base_dir, year, record=None):
         """Move to Short Videos directory."""
         dest_dir = Path(base_dir) / self.videos_dir / self.short_videos_dir / year
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         # Extract metadata and generate filename
-        metadata = self.ffmpeg_handler.extract_video_metadata(file_path)
+        metadata = self._extract_metadata(file_path, record)
         new_filename = self._generate_video_filename(file_path, metadata)
         dest_path = dest_dir / new_filename
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
     
-    def _move_to_regular_videos(self, file_path, base_dir, year):
+    def _move_to_regular_videos(self, file_path, base_dir, year, record=None):
         """Move to regular Videos directory."""
         dest_dir = Path(base_dir) / self.videos_dir / year
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         # Extract metadata and generate filename
-        metadata = self.ffmpeg_handler.extract_video_metadata(file_path)
+        metadata = self._extract_metadata(file_path, record)
         new_filename = self._generate_video_filename(file_path, metadata)
         dest_path = dest_dir / new_filename
-        return self._copy_file(file_path, dest_path)
+        return self._copy_file(file_path, dest_path, record)
+    
+    def _extract_metadata(self, file_path, record=None):
+        """Extract container metadata, from the record's shared header when there is one."""
+        if record is None:
+            return self.ffmpeg_handler.extract_video_metadata(file_path)
+        with record.open() as source:
+            return self.ffmpeg_handler.extract_video_metadata(file_path, source)
     
     def _generate_video_filename(self, file_path, metadata):
         """Generate video filename with datetime, make, model format."""
@@ -154,6 +161,6 @@ class VideoOrganizer:
         
         return new_filename
     
-    def _copy_file(self, src, dest):
+    def _copy_file(self, src, dest, record=None):
         """Copy file to destination with conflict resolution."""
-        return FileCopy.copy_with_conflict_resolution(src, dest)
\ No newline at end of file
+        return FileCopy.copy_with_conflict_resolution(src, dest, record)
\ No newline at end of file
@@ -0,0 +1,37 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from files_organizer import FilesOrganizer
+
+
+@pytest.fixture
+def organize():
+    """Return run(source, dest, processing=None, timeout=60, config=None) -> (result, stats, organizer).
+
+    The run goes through FilesOrganizer.organize() with the given processing
+    settings and other config sections; a run that does not finish within
+    timeout seconds is stopped and fails the test.
+    """
+    def run(source, dest, processing=None, timeout=60, config=None):
+        os.makedirs(dest, exist_ok=True)
+        config = {'musicbrainz': {'enabled': False}, 'processing': processing or {}, **(config or {})}
+        with open(os.path.join(dest, 'zensort_config.json'), 'w') as f:
+            json.dump(config, f)
+        organizer = FilesOrganizer(source, dest)
+        outcome = []
+        thread = threading.Thread(target=lambda: outcome.append(organizer.organize()), daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            organizer.stop()
+            thread.join(10)
+            pytest.fail(f"organize() did not finish within {timeout}s")
+        return outcome[0], organizer.get_stats(), organizer
+    return run
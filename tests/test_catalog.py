@@ -0,0 +1,30 @@
+import hashlib
+import sqlite3
+
+from catalog import CATALOG_NAME, catalog_class
+
+
+def test_sqlite_migration_keeps_null_paths_empty(tmp_path):
+    """A v1 row without a path migrates to an empty path, not the string 'None'."""
+    db_path = tmp_path / CATALOG_NAME
+    digests = [hashlib.sha256(name).hexdigest() for name in (b'a', b'b')]
+    with sqlite3.connect(db_path) as db:
+        db.execute("""
+            CREATE TABLE file_hashes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT,
+                file_hash TEXT NOT NULL,
+                file_size INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        db.execute("INSERT INTO file_hashes (file_path, file_hash, file_size) VALUES (?, ?, ?)",
+                   (str(tmp_path / 'Images' / 'a.jpg'), digests[0], 1))
+        db.execute("INSERT INTO file_hashes (file_path, file_hash, file_size) VALUES (NULL, ?, ?)",
+                   (digests[1], 1))
+
+    database = catalog_class('sqlite')(db_path, dedup_index='off')
+    assert database.connect()
+    rows = dict(database.conn.execute("SELECT file_hash, file_path FROM file_hashes").fetchall())
+    database.close()
+    assert rows == {bytes.fromhex(digests[0]): 'Images/a.jpg', bytes.fromhex(digests[1]): ''}
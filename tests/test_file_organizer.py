@@ -0,0 +1,32 @@
+import sqlite3
+
+from catalog import CATALOG_NAME
+
+
+def test_unique_sizes_are_hashed_while_copying(tmp_path, organize, monkeypatch):
+    """Files no cataloged file can match get their catalog hash from the copy, not a deferred re-read."""
+    import files_organizer
+
+    # Pending rows are only visible before the end-of-run pass hashes them
+    pending = []
+    hash_pending = files_organizer.FilesOrganizer._hash_pending
+
+    def counting_hash_pending(self):
+        pending.append(len(self.database.get_pending()))
+        return hash_pending(self)
+
+    monkeypatch.setattr(files_organizer.FilesOrganizer, '_hash_pending', counting_hash_pending)
+    source = tmp_path / 'source'
+    source.mkdir()
+    for n in range(1, 6):
+        (source / f"file{n}.txt").write_text('x' * n)
+    dest = tmp_path / 'dest'
+
+    result, stats, _ = organize(source, dest, {'incremental_scan': False})
+    assert result
+    assert stats['processed'] == 5
+    assert pending == [0]
+
+    with sqlite3.connect(dest / CATALOG_NAME) as db:
+        assert db.execute("SELECT COUNT(*) FROM pending_hashes").fetchone()[0] == 0
+        assert db.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0] == 5
@@ -0,0 +1,29 @@
+import sqlite3
+
+from PIL import Image
+
+from catalog import CATALOG_NAME
+
+
+def test_exports_of_pending_sources_are_indexed(tmp_path, organize):
+    """Originals whose catalog hash is deferred still get indexed exports that refresh with the settings."""
+    source = tmp_path / 'source'
+    source.mkdir()
+    for n in range(2):
+        Image.new('RGB', (400 + n, 300), (n * 100, 50, 50)).save(source / f"IMG_{n}.jpg")
+    dest = tmp_path / 'dest'
+    # Every file is fingerprint-first and fingerprints never collide, so the originals stay pending
+    processing = {'hash_while_copy': False, 'tiered_min_size_mb': 0, 'incremental_scan': False}
+
+    result, stats, _ = organize(source, dest, processing)
+    assert result
+    assert stats['exports'] == 2
+    with sqlite3.connect(dest / CATALOG_NAME) as db:
+        assert db.execute("SELECT COUNT(*) FROM export_index").fetchone()[0] == 2
+
+    # Exports made with other settings are recreated
+    result, stats, _ = organize(source, dest, processing, config={'image_export': {'quality': 60}})
+    assert result
+    assert stats['exports'] == 2
+    with sqlite3.connect(dest / CATALOG_NAME) as db:
+        assert db.execute("SELECT DISTINCT quality FROM export_index").fetchall() == [(60,)]
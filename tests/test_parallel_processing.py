@@ -0,0 +1,65 @@
+import hashlib
+import os
+
+from catalog import CATALOG_NAME, catalog_class
+
+
+def test_cached_digest_does_not_block_copies_of_the_same_content(tmp_path, organize):
+    """A queued file whose digest is cached must not hold copies hashed while copying."""
+    size = 16 * 1024 * 1024
+    processing = {'tiered_dedup': False, 'incremental_scan': False, 'max_workers': 2, 'dedup_workers': 1}
+    source, dest, earlier = tmp_path / 'source', tmp_path / 'dest', tmp_path / 'earlier'
+
+    # A cataloged file of the same size, so every source needs its full digest
+    earlier.mkdir()
+    (earlier / 'other.bin').write_bytes(b'\x01' * size)
+    organize(earlier, dest, processing)
+
+    source.mkdir()
+    content = os.urandom(size)
+    for n in range(1, 6):
+        (source / f"copy{n}.bin").write_bytes(content)
+    # The last copy's digest is known from the hash cache, the others are hashed while copying
+    st = os.stat(source / 'copy5.bin')
+    database = catalog_class('sqlite')(dest / CATALOG_NAME)
+    database.connect()
+    database.cache_hash(st.st_dev, st.st_ino, size, st.st_mtime_ns, hashlib.sha256(content).hexdigest())
+    database.close()
+
+    result, stats, _ = organize(source, dest, processing, timeout=30)
+    assert result
+    assert stats['processed'] == 1
+    assert stats['duplicates'] == 4
+
+
+def test_stage_handler_errors_end_the_run(tmp_path, organize, monkeypatch):
+    """A raising stage handler reports an error and releases the file's claim and reservations."""
+    import file_organizer
+
+    check_file = file_organizer.FileOrganizer.check_file
+    copy_file = file_organizer.FileOrganizer.copy_file
+
+    def failing_check(self, file_path):
+        if file_path.path.name == 'check.txt':
+            raise RuntimeError('check failed')
+        return check_file(self, file_path)
+
+    def failing_copy(self, checked, base_dir):
+        if checked.record.path.name == 'a.txt':
+            raise RuntimeError('copy failed')
+        return copy_file(self, checked, base_dir)
+
+    monkeypatch.setattr(file_organizer.FileOrganizer, 'check_file', failing_check)
+    monkeypatch.setattr(file_organizer.FileOrganizer, 'copy_file', failing_copy)
+    source = tmp_path / 'source'
+    source.mkdir()
+    # b.txt has a.txt's size, so it waits for a.txt's claim
+    (source / 'a.txt').write_text('same size 1')
+    (source / 'b.txt').write_text('same size 2')
+    (source / 'check.txt').write_text('never checked')
+    (source / 'c.txt').write_text('organized normally')
+
+    result, stats, _ = organize(source, tmp_path / 'dest', {'max_workers': 2, 'incremental_scan': False}, timeout=30)
+    assert result
+    assert stats['errors'] == 2
+    assert stats['processed'] == 2